@@ -5,9 +5,19 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.image import Image
 from kivy.uix.widget import Widget
+from kivy.uix.textinput import TextInput
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.graphics import Color, Rectangle, RoundedRectangle, Line
 from kivy.core.window import Window
+from kivy.clock import Clock
 import os
+import threading
+from datetime import datetime
+
+from preflight import PreflightRunner, CHECKS, OK, WARN
+from audit_log import get_journal
+import svn_push
 
 # ====== Palette Lear ======
 LEAR_RED = (0.85, 0.05, 0.15, 1)
@@ -15,6 +25,12 @@ DARK_TEXT = (0.08, 0.08, 0.1, 1)
 LIGHT_BG = (0.95, 0.96, 0.97, 1)
 WHITE = (1, 1, 1, 1)
 BORDER = (0.86, 0.87, 0.9, 1)
+STATUS_COLORS = {OK: "228B22", WARN: "E69500"}   # autres statuts -> rouge Lear
+
+# Fichiers de campagne par défaut (comme SVN_Repo_Mang.py)
+CONFIG_XML = "config.xml"
+SUITE_XML = "tests/RegressionSuite.xml"
+HISTORY_PAGE = 200   # lignes chargées par page dans l'historique
 
 class ChipButton(Button):
     """Badge type 'Progress Test' (fond rouge, angles arrondis)."""
@@ -57,9 +73,12 @@ class RedButton(Button):
             Color(*LEAR_RED)
             RoundedRectangle(pos=self.pos, size=self.size, radius=[8])
 
-class CardArea(Widget):
-    """Grande zone blanche avec bordure gris clair à droite."""
+class CardArea(BoxLayout):
+    """Grande zone blanche avec bordure gris clair à droite (contenu vertical)."""
     def __init__(self, **kwargs):
+        kwargs.setdefault("orientation", "vertical")
+        kwargs.setdefault("padding", [16, 16, 16, 16])
+        kwargs.setdefault("spacing", 6)
         super().__init__(**kwargs)
         self.bind(pos=self._draw, size=self._draw)
 
@@ -73,7 +92,58 @@ class CardArea(Widget):
             Color(*BORDER)
             Line(rectangle=(self.x, self.y, self.width, self.height), width=1.2)
 
+class HistoryView(RecycleView):
+    """Liste des actions du journal; la page suivante est chargée quand on atteint le bas."""
+    def __init__(self, journal, **kwargs):
+        super().__init__(**kwargs)
+        self.journal = journal
+        self.filters = {}
+        self.total = 0
+        self.viewclass = 'Label'
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, 26), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.bind(scroll_y=self._on_scroll)
+
+    def reset(self, **filters):
+        self.filters = filters
+        self.data = []
+        self.total = 0
+        self.scroll_y = 1
+        self.load_more()
+
+    def load_more(self):
+        offset = len(self.data)
+        if offset and offset >= self.total:
+            return
+        self.total, rows = self.journal.query(offset=offset, limit=HISTORY_PAGE, **self.filters)
+        self.data = self.data + [self._row(r) for r in rows]
+
+    def _on_scroll(self, _, value):
+        if value <= 0.02 and len(self.data) < self.total:
+            self.load_more()
+
+    @staticmethod
+    def _row(r):
+        when = datetime.fromtimestamp(r["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+        test = f"  [b]{r['test_id']}[/b]" if r["test_id"] else ""
+        detail = "  ".join(f"{k}={v}" for k, v in r["detail"].items())
+        return {"text": f"[color=999999]{when}[/color]  {r['operator']}  [color=D90D26]{r['action']}[/color]"
+                        f"{test}  {detail}",
+                "markup": True, "color": DARK_TEXT, "shorten": True}
+
 class LearUI(App):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.config_xml = CONFIG_XML
+        self.suite_xml = SUITE_XML
+        self.preflight = PreflightRunner()
+        self._preflight_rows = {}
+        self._preflight_busy = False
+        self._push_busy = False
+        self.journal = get_journal()
+
     def build(self):
         # Fenêtre
         Window.clearcolor = LIGHT_BG
@@ -143,6 +213,7 @@ class LearUI(App):
         btn_import_xml = RedButton(text="Import XML Test File")
         btn_import_cfg = RedButton(text="Import Configuration File")
         btn_push = RedButton(text="Push")
+        btn_push.bind(on_press=self.push_results)
 
         # On positionne comme sur l’image : 2 boutons en haut, espace, Push au milieu, espace, 2 boutons bas
         left.add_widget(btn_import_xml)
@@ -160,8 +231,12 @@ class LearUI(App):
         left.add_widget(Widget(size_hint_y=0.35))  # espace vertical
 
         bottom_row = BoxLayout(orientation='horizontal', spacing=14, size_hint_y=None, height=46)
-        bottom_row.add_widget(RedButton(text="History Tester Actions"))
-        bottom_row.add_widget(RedButton(text="Checks General Condition"))
+        btn_checks = RedButton(text="Checks General Condition")
+        btn_checks.bind(on_press=self.show_preflight)
+        btn_history = RedButton(text="History Tester Actions")
+        btn_history.bind(on_press=self.show_history)
+        bottom_row.add_widget(btn_history)
+        bottom_row.add_widget(btn_checks)
         left.add_widget(bottom_row)
 
         content.add_widget(left)
@@ -169,6 +244,7 @@ class LearUI(App):
         # ----- Grande zone blanche à droite -----
         right = BoxLayout(orientation='vertical', padding=[0, 0, 0, 0])
         panel = CardArea()
+        self.panel = panel
         right.add_widget(panel)
         content.add_widget(right)
 
@@ -176,6 +252,156 @@ class LearUI(App):
 
         return root
 
+    # ================== PREFLIGHT ==================
+    def _panel_label(self, text, **kwargs):
+        lbl = Label(text=text, markup=True, color=DARK_TEXT, halign='left', valign='middle',
+                    size_hint_y=None, height=kwargs.pop("height", 30), **kwargs)
+        lbl.bind(size=lambda inst, val: setattr(inst, 'text_size', val))
+        return lbl
+
+    def show_preflight(self, *_):
+        """Lance les checks en arrière-plan; chaque ligne est mise à jour dès que son check se termine."""
+        if self._preflight_busy:
+            return
+        self._preflight_busy = True
+        self.panel.clear_widgets()
+        self.panel.add_widget(self._panel_label("[b]General Condition Checks[/b]", font_size=20, height=40))
+        self._preflight_rows = {}
+        for name in CHECKS:
+            row = self._panel_label(f"[color=999999]…[/color]  [b]{name}[/b]  running")
+            self._preflight_rows[name] = row
+            self.panel.add_widget(row)
+        self.panel.add_widget(Widget())  # pousse les lignes vers le haut
+
+        ctx = {"config": self.config_xml, "suite": self.suite_xml}
+
+        def work():
+            try:
+                results = self.preflight.run(ctx, on_result=lambda r: Clock.schedule_once(lambda dt: self._show_check(r)))
+                self.journal.record("preflight", detail={r["check"]: r["status"] for r in results})
+            finally:
+                Clock.schedule_once(lambda dt: setattr(self, "_preflight_busy", False))
+
+        threading.Thread(target=work, name="preflight", daemon=True).start()
+
+    def _show_check(self, result):
+        row = self._preflight_rows.get(result["check"])
+        if row is None:
+            return
+        color = STATUS_COLORS.get(result["status"], "D90D26")
+        origin = "cached" if result["cached"] else f"{result['duration_s']:.2f} s"
+        row.text = (f"[color={color}][b]{result['status']}[/b][/color]  [b]{result['check']}[/b]  "
+                    f"{result['message']}  [color=999999]({origin})[/color]")
+
+    # ================== PUSH ==================
+    def push_results(self, *_):
+        """
+        Reprend les push interrompus (un échec n'empêche pas les autres) puis envoie les
+        artefacts de la config en un seul commit SVN. Un push stagé qui échoue encore
+        peut être abandonné (Discard).
+        """
+        if self._push_busy:
+            return
+        self._push_busy = True
+        self.panel.clear_widgets()
+        self.panel.add_widget(self._panel_label("[b]Push results to SVN[/b]", font_size=20, height=40))
+        status = self._panel_label("[color=999999]Staging artifacts…[/color]", height=60)
+        self.panel.add_widget(status)
+        pending_box = BoxLayout(orientation='vertical', spacing=4, size_hint_y=None, height=0)
+        self.panel.add_widget(pending_box)
+        self.panel.add_widget(Widget())
+
+        def show(text):
+            Clock.schedule_once(lambda dt: setattr(status, "text", text))
+
+        def work():
+            lines, still_failing, manifest = [], [], None
+            try:
+                for push_id in svn_push.pending_pushes():
+                    try:
+                        r = svn_push.resume(push_id)
+                    except Exception as e:
+                        still_failing.append((push_id, str(e)))
+                        continue
+                    lines.append(f"Resumed {push_id}: r{r['revision']}")
+                    self.journal.record("push", detail={k: r[k] for k in ("push_id", "revision", "uploaded")})
+                url, artifacts = svn_push.resolve_push_from_xml(self.config_xml)
+                if not artifacts:
+                    show("\n".join(lines + ["[color=E69500]Nothing to push (no artifact matches PushArtifacts).[/color]"]))
+                    return
+                pending = svn_push.pending_pushes(url=url)
+                if pending:
+                    # pas de nouvelle copie tant que le push précédent vers cette URL échoue
+                    show("\n".join(lines + [f"[color=E69500]Not staged: push {', '.join(pending)} to this URL "
+                                             f"is still pending. Push again to retry, or discard it.[/color]"]))
+                    return
+                manifest = svn_push.stage(url, artifacts, "Regression results")
+                r = svn_push.commit(manifest)
+                self.journal.record("push", detail={k: r[k] for k in ("push_id", "revision", "uploaded")})
+                head = ("[color=228B22][b]Committed r{revision}[/b][/color]".format(**r)
+                        if r["status"] == "committed" else "[color=228B22][b]Already up to date[/b][/color]")
+                lines.append(f"{head}  {r['uploaded']} uploaded, {r['skipped']} unchanged, "
+                             f"{r['upload_bytes'] / 1024:.1f} KiB, {r['round_trips']} round trips")
+                show("\n".join(lines))
+            except Exception as e:
+                # la note "stagé" seulement si un manifest existe (sinon rien à reprendre)
+                staged = manifest is not None and manifest["push_id"] in svn_push.pending_pushes()
+                note = f"  (staged as {manifest['push_id']}, will resume on next Push)" if staged else ""
+                show("\n".join(lines + [f"[color=D90D26][b]Push failed:[/b] {e}[/color]{note}"]))
+            finally:
+                Clock.schedule_once(lambda dt: self._show_failed_pushes(pending_box, still_failing))
+                Clock.schedule_once(lambda dt: setattr(self, "_push_busy", False))
+
+        threading.Thread(target=work, name="push", daemon=True).start()
+
+    def _show_failed_pushes(self, box, failed):
+        """Une ligne par push stagé qui échoue encore, avec un bouton pour l'abandonner."""
+        for push_id, error in failed:
+            row = BoxLayout(orientation='horizontal', spacing=8, size_hint_y=None, height=40)
+            lbl = self._panel_label(f"[color=E69500]Staged push {push_id} failed again:[/color] {error}", height=40)
+            btn = RedButton(text="Discard", size_hint_x=0.25, height=40)
+
+            def discard(_btn, push_id=push_id, lbl=lbl):
+                svn_push.discard(push_id)
+                self.journal.record("push_discard", detail={"push_id": push_id})
+                lbl.text = f"[color=999999]Staged push {push_id} discarded[/color]"
+                _btn.disabled = True
+
+            btn.bind(on_press=discard)
+            row.add_widget(lbl)
+            row.add_widget(btn)
+            box.add_widget(row)
+            box.height += row.height + box.spacing
+
+    # ================== HISTORIQUE ==================
+    def show_history(self, *_):
+        """Historique paginé du journal, filtrable par opérateur / id de test."""
+        self.panel.clear_widgets()
+        self.panel.add_widget(self._panel_label("[b]History Tester Actions[/b]", font_size=20, height=40))
+
+        filters = BoxLayout(orientation='horizontal', spacing=8, size_hint_y=None, height=40)
+        op_input = TextInput(hint_text="Operator", multiline=False)
+        test_input = TextInput(hint_text="Test id (e.g. TST_SEC_002)", multiline=False)
+        btn_filter = RedButton(text="Filter", size_hint_x=0.3, height=40)
+        filters.add_widget(op_input)
+        filters.add_widget(test_input)
+        filters.add_widget(btn_filter)
+        self.panel.add_widget(filters)
+
+        count = self._panel_label("")
+        self.panel.add_widget(count)
+        history = HistoryView(self.journal)
+        self.panel.add_widget(history)
+
+        def apply(*_):
+            history.reset(operator=op_input.text.strip() or None, test_id=test_input.text.strip() or None)
+            count.text = f"[color=999999]{history.total} entries[/color]"
+
+        btn_filter.bind(on_press=apply)
+        op_input.bind(on_text_validate=apply)
+        test_input.bind(on_text_validate=apply)
+        apply()
+
 
 if __name__ == "__main__":
     LearUI().run()
\ No newline at end of file
@@ -1,14 +1,14 @@
 # xml_driven_svn_loader.py
 # -*- coding: utf-8 -*-
-import os, re, subprocess, xml.etree.ElementTree as ET, shutil
+import os, re, subprocess, tempfile, time, xml.etree.ElementTree as ET, shutil
 from datetime import datetime
 from xml.etree.ElementTree import fromstring
 from packaging.version import Version, InvalidVersion
 
 # ---------- Utils ----------
-def run(cmd: list[str], cwd: str | None = None) -> str:
-    """Run a command and return stdout (raise on error)."""
-    p = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, check=True)
+def run(cmd: list[str], cwd: str | None = None, timeout: float | None = None) -> str:
+    """Run a command and return stdout (raise on error / timeout)."""
+    p = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, check=True, timeout=timeout)
     return p.stdout
 
 def ensure_dir(p: str):
@@ -25,12 +25,12 @@ def parse_semver_from_name(name: str) -> Version | None:
     return None
 
 # ---------- SVN helpers (CLI) ----------
-def svn_list_xml(repo_url: str) -> list[dict]:
+def svn_list_xml(repo_url: str, timeout: float | None = None) -> list[dict]:
     """
     Retourne une liste de fichiers avec métadonnées en se basant sur 'svn list --xml'.
     Nécessite la CLI Subversion (svn). Ref: Subversion CLI reference.  # [4](https://www.visualsvn.com/support/svnbook/ref/svn/)[5](https://www.visualsvn.com/support/svnbook/ref/)
     """
-    out = run(["svn", "list", "--xml", repo_url])
+    out = run(["svn", "list", "--xml", repo_url], timeout=timeout)
     root = ET.fromstring(out)
     items = []
     for entry in root.findall(".//entry"):
@@ -68,6 +68,38 @@ def svn_export_file(file_url: str, dest_folder: str) -> str:
     run(["svn", "export", "--force", file_url, local_path])
     return local_path
 
+def svn_list_tree(repo_url: str, timeout: float | None = None) -> dict[str, dict]:
+    """
+    Arborescence distante en un seul appel 'svn list -R --xml':
+    {chemin relatif: {"kind": "file"|"dir", "revision": int}}.
+    """
+    out = run(["svn", "list", "-R", "--xml", "--non-interactive", repo_url], timeout=timeout)
+    tree = {}
+    for entry in ET.fromstring(out).findall(".//entry"):
+        name = entry.findtext("name") or ""
+        commit_el = entry.find("commit")
+        rev = int(commit_el.get("revision", "0")) if commit_el is not None else 0
+        tree[name] = {"kind": entry.get("kind"), "revision": rev}
+    return tree
+
+def svnmucc_commit(root_url: str, actions: list[str], message: str, timeout: float | None = None) -> int:
+    """
+    Applique une liste d'actions svnmucc (mkdir/put/rm..., URLs relatives à root_url)
+    en UN seul commit atomique côté serveur. Retourne la révision créée.
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".svnmucc", delete=False, encoding="utf-8") as f:
+        f.write("\n".join(actions) + "\n")
+        args_file = f.name
+    try:
+        out = run(["svnmucc", "--non-interactive", "-U", root_url, "-m", message, "-X", args_file],
+                  timeout=timeout)
+    finally:
+        os.remove(args_file)
+    m = re.search(r"\br(\d+) committed", out)
+    if not m:
+        raise RuntimeError(f"Unexpected svnmucc output: {out.strip()!r}")
+    return int(m.group(1))
+
 # ---------- Selection policies ----------
 def select_latest(items: list[dict], policy: str = "semver_then_time", name_pattern: str | None = None) -> dict:
     candidates = items
@@ -113,6 +145,49 @@ def open_canoe_and_run(cfg_local_path: str):
     # … exécution de ta campagne ici …
     # app.stop_measurement(); app.quit()
 
+def run_canoe_measurement(cfg_local_path: str, max_duration: float | None = None, poll: float = 1.0) -> bool:
+    """
+    Variante bloquante de open_canoe_and_run: attend la fin de la mesure (arrêtée par
+    la configuration/les test modules), ou l'arrête après max_duration secondes,
+    puis ferme CANoe. Retourne True si la mesure s'est terminée d'elle-même.
+    Seul ce qui a été ouvert/démarré est arrêté; une erreur de fermeture ne masque
+    jamais l'erreur d'origine.
+    """
+    from py_canoe import CANoe  # type: ignore
+    app = CANoe()
+    opened = started = False
+
+    def close(quiet: bool):
+        errors = []
+        for call, needed in ((app.stop_measurement, started), (app.quit, opened)):
+            if needed:
+                try:
+                    call()
+                except Exception as e:
+                    errors.append(e)
+        if errors and not quiet:
+            raise errors[0]
+
+    try:
+        app.open(canoe_cfg=cfg_local_path, visible=True, auto_save=False, prompt_user=False)
+        opened = True
+        app.compile_all_capl_nodes()
+        started = bool(app.start_measurement())
+        if not started:
+            raise RuntimeError(f"CANoe measurement did not start for {cfg_local_path}")
+        deadline = time.monotonic() + max_duration if max_duration else None
+        ended = True
+        while app.get_measurement_running_status():
+            if deadline is not None and time.monotonic() >= deadline:
+                ended = False
+                break
+            time.sleep(poll)
+    except BaseException:
+        close(quiet=True)
+        raise
+    close(quiet=False)
+    return ended
+
 def resolve_from_xml(xml_path: str) -> tuple[str, str]:
     root = ET.parse(xml_path).getroot()
     repo = (root.findtext("./SVN_Path") or "").strip()
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+# audit_log.py
+# -*- coding: utf-8 -*-
+"""
+Journal append-only des actions opérateur ("History Tester Actions").
+
+Stockage: segments binaires 'seg-000001.log' (enregistrements compacts, CRC32) dans un
+dossier. Un segment plein est scellé et reçoit un index 'seg-000001.idx'
+(offsets, horodatages, codes opérateur / test) relu au démarrage sans re-scanner le log.
+Index secondaires en mémoire: temps (bisect, horodatages monotones), opérateur et
+id de test (listes de positions par segment). query() ne lit sur disque que la page
+demandée. compact() fusionne les petits segments scellés en 'seg-000001-000008.log'
+(un segment dont la plage est couverte par un autre est obsolète et ignoré).
+
+Plusieurs processus peuvent partager un dossier (UI, runner, CLI): chaque écriture et
+chaque lecture se fait sous un verrou de fichier ('journal.lock'), après avoir rattrapé
+ce que les autres processus ont ajouté; l'offset d'un enregistrement est celui de la fin
+réelle du fichier. Le mode read_only ne tronque ni ne modifie jamais rien.
+
+    python audit_log.py --journal ./_journal --operator jdoe --limit 20
+"""
+import argparse, getpass, json, os, re, struct, sys, threading, time, uuid, zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+
+DEFAULT_JOURNAL_DIR = "./_journal"
+
+# len(payload) u4 | crc32(payload) u4 | payload = ts f8 | 3 x u2 + u4 (tailles) | op | action | test | detail(JSON)
+_HEAD = struct.Struct("<II")
+_BODY = struct.Struct("<dHHHI")
+_SEG_NAME = re.compile(r"^seg-(\d{6})(?:-(\d{6}))?\.log$")
+_LOCK_FILE = "journal.lock"
+_COMPACT_LOCK_FILE = "compact.lock"
+
+class JournalReadOnly(Exception):
+    pass
+
+def _encode(ts: float, operator: str, action: str, test_id: str, detail: dict | None) -> bytes:
+    parts = [s.encode("utf-8") for s in (operator, action, test_id)]
+    det = json.dumps(detail, ensure_ascii=False, separators=(",", ":")).encode("utf-8") if detail else b""
+    payload = _BODY.pack(ts, *(len(p) for p in parts), len(det)) + b"".join(parts) + det
+    return _HEAD.pack(len(payload), zlib.crc32(payload)) + payload
+
+def _decode(payload: bytes) -> dict:
+    ts, lo, la, lt, ld = _BODY.unpack_from(payload)
+    pos = _BODY.size
+    fields = []
+    for n in (lo, la, lt, ld):
+        fields.append(payload[pos:pos + n].decode("utf-8"))
+        pos += n
+    return {"ts": ts, "operator": fields[0], "action": fields[1], "test_id": fields[2],
+            "detail": json.loads(fields[3]) if fields[3] else {}}
+
+class _FileLock:
+    """Verrou exclusif inter-processus (fcntl / msvcrt) sur un fichier du journal."""
+    def __init__(self, path: str, blocking: bool = True):
+        self.path = path
+        self.blocking = blocking
+        self._f = None
+
+    def acquire(self) -> bool:
+        f = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not self.blocking:
+                            raise
+                        time.sleep(0.01)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if self.blocking else fcntl.LOCK_NB))
+        except OSError:
+            f.close()
+            return False
+        self._f = f
+        return True
+
+    def release(self):
+        if self._f is None:
+            return
+        if os.name == "nt":
+            import msvcrt
+            self._f.seek(0)
+            msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        self._f.close()
+        self._f = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class _Segment:
+    """Index en mémoire d'un segment: tableaux parallèles + listes de positions."""
+    def __init__(self, first: int, last: int, path: str):
+        self.first = first
+        self.last = last
+        self.path = path
+        self.size = 0
+        self.offsets = array("Q")
+        self.times = array("d")
+        self.ops = array("I")
+        self.tests = array("I")
+        self.by_op: dict[int, array] = {}
+        self.by_test: dict[int, array] = {}
+
+    def add(self, offset: int, ts: float, op: int, test: int):
+        pos = len(self.offsets)
+        self.offsets.append(offset)
+        self.times.append(ts)
+        self.ops.append(op)
+        self.tests.append(test)
+        self.by_op.setdefault(op, array("I")).append(pos)
+        self.by_test.setdefault(test, array("I")).append(pos)
+
+class AuditJournal:
+    def __init__(self, directory: str = DEFAULT_JOURNAL_DIR, segment_bytes: int = 8 << 20,
+                 compact_every: int = 8, read_only: bool = False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compact_every = compact_every
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        self._flock = _FileLock(os.path.join(directory, _LOCK_FILE))
+        self._names: dict[str, dict[str, int]] = {"op": {}, "test": {}}
+        self._tables: dict[str, list[str]] = {"op": [], "test": []}
+        self._segments: list[_Segment] = []
+        self._active_file = None
+        self._last_ts = 0.0
+        self._readers: dict[str, object] = {}
+        self._compactor: threading.Thread | None = None
+        self._depth = 0
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            self._refresh()
+
+    @contextmanager
+    def _locked(self):
+        """Verrou du processus + verrou de fichier partagé entre processus (réentrant)."""
+        with self._lock:
+            outer = self._depth == 0 and os.path.isdir(self.directory)
+            if outer:
+                self._flock.acquire()
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if outer:
+                    self._flock.release()
+
+    # ---------- String tables ----------
+    def _code(self, kind: str, name: str) -> int:
+        codes = self._names[kind]
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(self._tables[kind])
+            self._tables[kind].append(name)
+        return code
+
+    # ---------- Disk state ----------
+    def _seg_path(self, first: int, last: int | None = None) -> str:
+        name = f"seg-{first:06d}" + (f"-{last:06d}" if last is not None and last != first else "")
+        return os.path.join(self.directory, name + ".log")
+
+    def _list_disk(self) -> list[tuple[int, int, str]]:
+        """Segments visibles (first, last, path) triés; ceux couverts par une fusion sont ignorés."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            m = _SEG_NAME.match(name)
+            if m:
+                first = int(m.group(1))
+                found.append((first, int(m.group(2) or first), os.path.join(self.directory, name)))
+        found.sort(key=lambda x: (x[0], -x[1]))
+        visible, covered_to = [], 0
+        for first, last, path in found:
+            if last <= covered_to:
+                if not self.read_only:
+                    self._remove_files(path)   # restes d'une compaction interrompue
+                continue
+            visible.append((first, last, path))
+            covered_to = last
+        return visible
+
+    def _refresh(self):
+        """
+        Aligne l'index mémoire sur le disque (appelé sous verrou): nouveaux segments,
+        compactions et enregistrements ajoutés par d'autres processus.
+        """
+        disk = self._list_disk()
+        if not disk and not self.read_only:
+            open(self._seg_path(1), "ab").close()
+            disk = [(1, 1, self._seg_path(1))]
+        old = {s.path: s for s in self._segments}
+        segments = []
+        for i, (first, last, path) in enumerate(disk):
+            active = i == len(disk) - 1
+            seg = old.get(path)
+            if seg is None:
+                seg = _Segment(first, last, path)
+                if active or not self._load_index(seg):
+                    self._scan(seg, truncate=active and not self.read_only)
+                    if not active and not self.read_only:
+                        self._write_index(seg)
+            elif os.path.getsize(path) != seg.size:
+                self._scan(seg, truncate=active and not self.read_only)
+            segments.append(seg)
+        for path in set(old) - {s.path for s in segments}:
+            reader = self._readers.pop(path, None)
+            if reader:
+                reader.close()
+        self._segments = segments
+        self._last_ts = max([s.times[-1] for s in segments if s.times] + [self._last_ts])
+
+    def _scan(self, seg: _Segment, truncate: bool):
+        """
+        Lit un segment à partir de seg.size. Une fin incomplète/corrompue est ignorée;
+        l'écrivain (sous verrou, donc aucune écriture en cours) la tronque.
+        """
+        with open(seg.path, "rb") as f:
+            f.seek(seg.size)
+            data = f.read()
+        base, pos = seg.size, 0
+        while pos + _HEAD.size <= len(data):
+            length, crc = _HEAD.unpack_from(data, pos)
+            payload = data[pos + _HEAD.size:pos + _HEAD.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            rec = _decode(payload)
+            seg.add(base + pos, rec["ts"], self._code("op", rec["operator"]), self._code("test", rec["test_id"]))
+            pos += _HEAD.size + length
+        seg.size = base + pos
+        if truncate and pos < len(data):
+            with open(seg.path, "r+b") as f:
+                f.truncate(seg.size)
+
+    def _write_index(self, seg: _Segment):
+        ops = sorted(set(seg.ops))
+        tests = sorted(set(seg.tests))
+        op_local = {c: i for i, c in enumerate(ops)}
+        test_local = {c: i for i, c in enumerate(tests)}
+        header = {"n": len(seg.offsets), "size": seg.size,
+                  "ops": [self._tables["op"][c] for c in ops],
+                  "tests": [self._tables["test"][c] for c in tests]}
+        tmp = seg.path[:-4] + f".idx.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            seg.offsets.tofile(f)
+            seg.times.tofile(f)
+            array("I", (op_local[c] for c in seg.ops)).tofile(f)
+            array("I", (test_local[c] for c in seg.tests)).tofile(f)
+        os.replace(tmp, seg.path[:-4] + ".idx")
+
+    def _load_index(self, seg: _Segment) -> bool:
+        idx_path = seg.path[:-4] + ".idx"
+        try:
+            with open(idx_path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["size"] != os.path.getsize(seg.path):
+                    return False
+                n = header["n"]
+                arrays = [array("Q"), array("d"), array("I"), array("I")]
+                for arr in arrays:
+                    arr.fromfile(f, n)
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        op_map = [self._code("op", name) for name in header["ops"]]
+        test_map = [self._code("test", name) for name in header["tests"]]
+        offsets, times, ops, tests = arrays
+        for i in range(n):
+            seg.add(offsets[i], times[i], op_map[ops[i]], test_map[tests[i]])
+        seg.size = header["size"]
+        return True
+
+    def _remove_files(self, log_path: str):
+        reader = self._readers.pop(log_path, None)
+        if reader:
+            reader.close()
+        for path in (log_path, log_path[:-4] + ".idx"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass   # encore ouvert ailleurs (Windows): reste obsolète, supprimé plus tard
+
+    # ---------- Write ----------
+    def record(self, action: str, operator: str | None = None, test_id: str = "",
+               detail: dict | None = None) -> float:
+        """Ajoute une action; retourne son horodatage."""
+        if self.read_only:
+            raise JournalReadOnly(f"{self.directory} is opened read-only")
+        operator = operator or getpass.getuser()
+        with self._locked():
+            self._refresh()
+            ts = max(time.time(), self._last_ts)
+            data = _encode(ts, operator, action, test_id or "", detail)
+            seg = self._segments[-1]
+            f = self._writer(seg)
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            seg.add(offset, ts, self._code("op", operator), self._code("test", test_id or ""))
+            seg.size = offset + len(data)
+            self._last_ts = ts
+            rolled = seg.size >= self.segment_bytes
+            if rolled:
+                self._roll()
+        if rolled:
+            self._maybe_compact_in_background()
+        return ts
+
+    def _writer(self, seg: _Segment):
+        if self._active_file is None or self._active_file.name != seg.path:
+            if self._active_file is not None:
+                self._active_file.close()
+            self._active_file = open(seg.path, "ab")
+        return self._active_file
+
+    def _roll(self):
+        seg = self._segments[-1]
+        self._active_file.close()
+        self._active_file = None
+        self._write_index(seg)
+        new = _Segment(seg.last + 1, seg.last + 1, self._seg_path(seg.last + 1))
+        open(new.path, "ab").close()
+        self._segments.append(new)
+
+    def _maybe_compact_in_background(self):
+        """Compaction hors du thread appelant (UI): record() ne bloque jamais dessus."""
+        sealed_small = [s for s in self._segments[:-1] if s.first == s.last]
+        if not self.compact_every or len(sealed_small) < self.compact_every:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="journal-compaction", daemon=True)
+        self._compactor.start()
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._active_file:
+                self._active_file.close()
+                self._active_file = None
+            for f in self._readers.values():
+                f.close()
+            self._readers.clear()
+
+    # ---------- Compaction ----------
+    def compact(self, target_bytes: int | None = None, retention_days: float | None = None) -> int:
+        """
+        Fusionne les segments scellés consécutifs jusqu'à target_bytes et supprime ceux
+        entièrement plus vieux que retention_days. Retourne le nombre de segments supprimés.
+        La copie se fait sans verrou (segments scellés immuables); seul l'échange final
+        (rename vers un nouveau nom de plage) est fait sous verrou.
+        """
+        if self.read_only:
+            raise JournalReadOnly(f"{self.directory} is opened read-only")
+        target = target_bytes or self.segment_bytes * 4
+        guard = _FileLock(os.path.join(self.directory, _COMPACT_LOCK_FILE), blocking=False)
+        if not guard.acquire():
+            return 0   # compaction déjà en cours dans un autre processus
+        try:
+            for name in os.listdir(self.directory):
+                if name.endswith(".log.tmp"):
+                    os.remove(os.path.join(self.directory, name))
+            removed = 0
+            with self._locked():
+                self._refresh()
+                if retention_days is not None:
+                    cutoff = time.time() - retention_days * 86400
+                    for s in self._segments[:-1]:
+                        if not s.times or s.times[-1] < cutoff:
+                            self._remove_files(s.path)
+                            removed += 1
+                    self._refresh()
+                sealed = list(self._segments[:-1])
+
+            groups, group = [], []
+            for s in sealed + [None]:
+                if s is not None and sum(g.size for g in group) + s.size <= target:
+                    group.append(s)
+                    continue
+                if len(group) > 1:
+                    groups.append(group)
+                group = [s] if s is not None else []
+            for group in groups:
+                if self._merge(group):
+                    removed += len(group)
+            return removed
+        finally:
+            guard.release()
+
+    def _merge(self, group: list[_Segment]) -> bool:
+        path = self._seg_path(group[0].first, group[-1].last)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as out:
+                for s in group:
+                    with open(s.path, "rb") as f:
+                        out.write(f.read(s.size))
+        except OSError:
+            return False
+        with self._locked():
+            self._refresh()
+            current = {s.path for s in self._segments[:-1]}
+            if not all(s.path in current for s in group):
+                os.remove(tmp)
+                return False
+            merged = _Segment(group[0].first, group[-1].last, path)
+            base = 0
+            for s in group:
+                for i in range(len(s.offsets)):
+                    merged.add(base + s.offsets[i], s.times[i], s.ops[i], s.tests[i])
+                base += s.size
+            merged.size = base
+            # le nouveau nom couvre la plage: les anciens segments deviennent obsolètes
+            # au moment du rename, même si leur suppression échoue
+            os.replace(tmp, path)
+            self._write_index(merged)
+            for s in group:
+                self._remove_files(s.path)
+            index = self._segments.index(group[0])
+            self._segments[index:index + len(group)] = [merged]
+        return True
+
+    # ---------- Read ----------
+    def _reader(self, path: str):
+        f = self._readers.get(path)
+        if f is None:
+            f = self._readers[path] = open(path, "rb")
+        return f
+
+    def _read(self, seg: _Segment, pos: int) -> dict:
+        f = self._reader(seg.path)
+        f.seek(seg.offsets[pos])
+        length, _ = _HEAD.unpack(f.read(_HEAD.size))
+        return _decode(f.read(length))
+
+    def _candidates(self, seg: _Segment, op: int | None, test: int | None,
+                    t_start: float | None, t_end: float | None):
+        """Positions (croissantes) du segment qui satisfont les filtres indexés."""
+        lo = bisect_left(seg.times, t_start) if t_start is not None else 0
+        hi = bisect_right(seg.times, t_end) if t_end is not None else len(seg.times)
+        if op is None and test is None:
+            return range(lo, hi)
+        lists = []
+        if op is not None:
+            lists.append((seg.by_op.get(op, array("I")), seg.ops, op))
+        if test is not None:
+            lists.append((seg.by_test.get(test, array("I")), seg.tests, test))
+        lists.sort(key=lambda x: len(x[0]))
+        postings = lists[0][0]
+        postings = postings[bisect_left(postings, lo):bisect_left(postings, hi)]
+        if len(lists) == 2:
+            _, codes, code = lists[1]
+            postings = array("I", (p for p in postings if codes[p] == code))
+        return postings
+
+    def query(self, operator: str | None = None, test_id: str | None = None,
+              t_start: float | None = None, t_end: float | None = None,
+              offset: int = 0, limit: int = 100) -> tuple[int, list[dict]]:
+        """Retourne (nombre total de correspondances, page de lignes), plus récentes d'abord."""
+        with self._locked():
+            self._refresh()
+            op = test = None
+            if operator:
+                op = self._names["op"].get(operator)
+                if op is None:
+                    return 0, []
+            if test_id:
+                test = self._names["test"].get(test_id)
+                if test is None:
+                    return 0, []
+            total, rows, skip = 0, [], offset
+            for seg in reversed(self._segments):
+                cands = self._candidates(seg, op, test, t_start, t_end)
+                n = len(cands)
+                total += n
+                if len(rows) >= limit or skip >= n:
+                    skip -= min(skip, n)
+                    continue
+                for i in range(n - 1 - skip, -1, -1):
+                    if len(rows) >= limit:
+                        break
+                    rows.append(self._read(seg, cands[i]))
+                skip = 0
+            return total, rows
+
+    def __len__(self) -> int:
+        with self._locked():
+            self._refresh()
+            return sum(len(s.offsets) for s in self._segments)
+
+# ---------- Shared journal ----------
+_journals: dict[tuple[str, bool], AuditJournal] = {}
+_journals_lock = threading.Lock()
+
+def get_journal(directory: str = DEFAULT_JOURNAL_DIR, read_only: bool = False) -> AuditJournal:
+    """Une instance par dossier (et par mode) et par processus."""
+    key = (os.path.abspath(directory), read_only)
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = AuditJournal(directory, read_only=read_only)
+        return _journals[key]
+
+# ---------- CLI ----------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Query the tester actions journal.")
+    ap.add_argument("--journal", default=DEFAULT_JOURNAL_DIR)
+    ap.add_argument("--operator")
+    ap.add_argument("--test-id")
+    ap.add_argument("--since", type=float, help="Only entries from the last N hours.")
+    ap.add_argument("--offset", type=int, default=0)
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--compact", action="store_true", help="Compact sealed segments and exit.")
+    ap.add_argument("--retention-days", type=float)
+    args = ap.parse_args(argv)
+
+    if args.compact:
+        journal = AuditJournal(args.journal)
+        print(json.dumps({"removed_segments": journal.compact(retention_days=args.retention_days)}))
+        journal.close()
+        return 0
+    journal = AuditJournal(args.journal, read_only=True)
+    t_start = time.time() - args.since * 3600 if args.since else None
+    total, rows = journal.query(args.operator, args.test_id, t_start, None, args.offset, args.limit)
+    print(json.dumps({"total": total, "rows": rows}, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
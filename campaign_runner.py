@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# campaign_runner.py
+# -*- coding: utf-8 -*-
+"""
+Exécution headless (CI / nightly) d'une file de campagnes (config XML, suite XML).
+
+    python campaign_runner.py --job config.xml tests/RegressionSuite.xml
+    python campaign_runner.py --queue jobs.jsonl --workers 4
+    python campaign_runner.py --watch ./queue --poll 10      # mode daemon
+
+Chaque ligne de --queue (et chaque fichier *.json de --watch) est un objet
+{"id": "...", "config": "config.xml", "suite": "RegressionSuite.xml"}
+avec, en option, "trace" (log ASC de la mesure) et "checks" (JSON, voir trace_analysis.py).
+La progression est émise en JSON lines sur stdout.
+"""
+import argparse, hashlib, json, os, shutil, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TextIO
+
+from SVN_Repo_Mang import resolve_from_xml, svn_list_xml, svn_export_file, select_latest, ensure_dir
+from regression_suite import parse_suite
+
+# ---------- Progress ----------
+class ProgressEmitter:
+    """Écrit un événement JSON par ligne (thread-safe)."""
+    def __init__(self, stream: TextIO = sys.stdout):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, **fields):
+        record = {"ts": round(time.time(), 3), "event": event, **fields}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+def journaled(emit: Callable, journal) -> Callable:
+    """Recopie les événements utiles (sélection config, run, verdicts) dans le journal d'actions."""
+    def wrapped(event: str, **fields):
+        emit(event, **fields)
+        if event == "config_selected":
+            journal.record("select_config", detail={"job": fields["job"], "name": fields["name"]})
+        elif event == "job_finished":
+            journal.record("run", detail={"job": fields["job"], "suite": fields["suite"], "status": fields["status"]})
+        elif event == "verdicts":
+            for tid, v in fields["verdicts"].items():
+                if v["verdict"] != "NOT_EVALUATED":
+                    journal.record("verdict", test_id=tid, detail={"job": fields["job"], "verdict": v["verdict"]})
+    return wrapped
+
+# ---------- Shared caches ----------
+class SharedCaches:
+    """
+    Caches partagés entre jobs:
+    - listing 'svn list --xml' par URL de dépôt (TTL),
+    - export par (url, date de commit): un fichier déjà exporté n'est pas re-téléchargé.
+      Chaque export a son propre dossier (LocalCache/<hash url+date>/<nom>): deux URLs ou
+      deux révisions d'un même nom ne partagent jamais un fichier, et le .cfx ouvert par
+      un job en cours n'est jamais réécrit par un autre.
+    """
+    def __init__(self, list_ttl: float = 300.0):
+        self.list_ttl = list_ttl
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}
+        self._listings: dict[str, tuple[float, list[dict]]] = {}
+        self._exports: dict[tuple[str, str, str], tuple[str, tuple]] = {}
+        self.stats = {"list_hits": 0, "list_misses": 0, "export_hits": 0, "export_misses": 0}
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def list(self, repo_url: str) -> list[dict]:
+        with self._key_lock(("list", repo_url)):
+            cached = self._listings.get(repo_url)
+            if cached and time.monotonic() - cached[0] < self.list_ttl:
+                self.stats["list_hits"] += 1
+                return [dict(x) for x in cached[1]]
+            items = svn_list_xml(repo_url)
+            self._listings[repo_url] = (time.monotonic(), items)
+            self.stats["list_misses"] += 1
+            return [dict(x) for x in items]
+
+    @staticmethod
+    def _identity(path: str) -> tuple | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def export(self, entry: dict, cache_dir: str) -> str:
+        key = (entry["url"], entry.get("date", ""), os.path.abspath(cache_dir))
+        with self._key_lock(("export",) + key):
+            cached = self._exports.get(key)
+            # hit seulement si le fichier est toujours celui exporté (taille + mtime)
+            if cached and self._identity(cached[0]) == cached[1]:
+                self.stats["export_hits"] += 1
+                return cached[0]
+            digest = hashlib.sha1(f"{entry['url']}\n{entry.get('date', '')}".encode("utf-8")).hexdigest()[:12]
+            local = svn_export_file(entry["url"], os.path.join(cache_dir, digest))
+            self._exports[key] = (local, self._identity(local))
+            self.stats["export_misses"] += 1
+            return local
+
+# ---------- Jobs ----------
+MEASUREMENT_MARGIN_S = 120.0
+
+def measurement_budget(suite: dict) -> float | None:
+    """Durée max d'une mesure: somme des timeouts (x tentatives) de la suite + marge."""
+    total = sum(t["timeout"] * (1 + t["retry_count"]) for t in suite["tests"].values())
+    return total + MEASUREMENT_MARGIN_S if total else None
+
+def canoe_executor(cfg_local_path: str, suite: dict):
+    """
+    Exécuteur par défaut (Windows / py_canoe): ouverture CANoe + mesure, et ne rend
+    la main qu'une fois la mesure terminée, arrêtée et CANoe fermé.
+    """
+    from SVN_Repo_Mang import run_canoe_measurement
+    budget = measurement_budget(suite)
+    if not run_canoe_measurement(cfg_local_path, max_duration=budget):
+        raise RuntimeError(f"measurement still running after {budget:g} s, stopped")
+
+def dry_run_executor(cfg_local_path: str, suite: dict):
+    """Exécuteur sans CANoe: résolution SVN + validation de la suite uniquement."""
+    return None
+
+def normalize_job(raw: dict, index: int) -> dict:
+    if not raw.get("config") or not raw.get("suite"):
+        raise ValueError(f"Job #{index}: 'config' and 'suite' are required.")
+    job = {"id": str(raw.get("id") or f"job-{index}"), "config": raw["config"], "suite": raw["suite"]}
+    if raw.get("trace"):
+        if not raw.get("checks"):
+            raise ValueError(f"Job #{index}: 'checks' is required with 'trace'.")
+        job.update(trace=raw["trace"], checks=raw["checks"])
+    return job
+
+def load_queue_file(path: str) -> list[dict]:
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            jobs.append(json.loads(line))
+    return jobs
+
+def run_job(job: dict, caches: SharedCaches, executor: Callable, emit: Callable,
+            exec_slots: threading.Semaphore) -> dict:
+    """Résolution SVN -> export -> parse suite -> exécution. Ne lève pas: retourne un résultat."""
+    t0 = time.monotonic()
+    result = {"id": job["id"], "config": job["config"], "suite": job["suite"], "status": "failed"}
+    stage = "resolve"
+    try:
+        emit("job_started", job=job["id"])
+        repo, policy, pattern, cache = resolve_from_xml(job["config"])
+        stage = "list"
+        entries = caches.list(repo)
+        chosen = select_latest(entries, policy, pattern)
+        emit("config_selected", job=job["id"], name=chosen["name"], url=chosen["url"])
+        stage = "export"
+        local_cfg = caches.export(chosen, cache)
+        stage = "suite"
+        suite = parse_suite(job["suite"])
+        emit("suite_loaded", job=job["id"], tests=len(suite["tests"]), categories=len(suite["categories"]))
+        stage = "execute"
+        with exec_slots:
+            emit("execution_started", job=job["id"], cfg=local_cfg)
+            started = time.time()
+            executor(local_cfg, suite)   # rend la main mesure terminée (canoe_executor)
+        emit("execution_finished", job=job["id"])
+        result.update(cfg=local_cfg, tests=len(suite["tests"]))
+        if job.get("trace"):
+            # verdicts uniquement sur la trace de cette mesure, une fois celle-ci terminée
+            stage = "verdict"
+            if executor is not dry_run_executor and os.path.getmtime(job["trace"]) < started:
+                raise RuntimeError(f"trace {job['trace']} was not written by this measurement")
+            from trace_analysis import analyze_trace
+            verdicts = analyze_trace(job["trace"], job["checks"], suite)
+            # comme la CLI trace_analysis: seuls PASS et NOT_EVALUATED sont acceptés
+            failed = sorted(tid for tid, v in verdicts.items() if v["verdict"] in ("FAIL", "INCONCLUSIVE"))
+            emit("verdicts", job=job["id"], verdicts=verdicts)
+            result["failed_tests"] = failed
+            if failed:
+                raise RuntimeError(f"{len(failed)} test(s) failed")
+        result["status"] = "passed"
+    except Exception as e:
+        result.update(stage=stage, error=f"{type(e).__name__}: {e}")
+    result["duration_s"] = round(time.monotonic() - t0, 3)
+    emit("job_finished", job=job["id"], **{k: v for k, v in result.items() if k != "id"})
+    return result
+
+def run_queue(jobs: list[dict], workers: int = 1, executor: Callable = canoe_executor,
+              emit: Callable | None = None, caches: SharedCaches | None = None,
+              canoe_instances: int = 1) -> list[dict]:
+    """Exécute une file de jobs; la résolution SVN est parallèle, l'exécution limitée à canoe_instances."""
+    emit = emit or ProgressEmitter()
+    caches = caches or SharedCaches()
+    exec_slots = threading.Semaphore(max(1, canoe_instances))
+    emit("queue_started", jobs=len(jobs), workers=workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(lambda j: run_job(j, caches, executor, emit, exec_slots), jobs))
+    failed = sum(1 for r in results if r["status"] != "passed")
+    emit("queue_finished", jobs=len(results), failed=failed, cache=dict(caches.stats))
+    return results
+
+# ---------- Daemon ----------
+def watch_queue_dir(queue_dir: str, poll: float = 10.0, workers: int = 1,
+                    executor: Callable = canoe_executor, emit: Callable | None = None,
+                    canoe_instances: int = 1, once: bool = False):
+    """
+    Mode daemon: ramasse les fichiers *.json de queue_dir, les exécute, puis les
+    déplace dans queue_dir/done ou queue_dir/failed (avec le résultat).
+    """
+    emit = emit or ProgressEmitter()
+    caches = SharedCaches()
+    done_dir = ensure_dir(os.path.join(queue_dir, "done"))
+    failed_dir = ensure_dir(os.path.join(queue_dir, "failed"))
+    while True:
+        batch, sources = [], {}
+        for name in sorted(os.listdir(queue_dir)):
+            path = os.path.join(queue_dir, name)
+            if not name.endswith(".json") or not os.path.isfile(path):
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    raw = json.load(f)
+                raw.setdefault("id", os.path.splitext(name)[0])
+                job = normalize_job(raw, len(batch) + 1)
+                if job["id"] in sources:
+                    job["id"] = name
+            except (OSError, ValueError) as e:
+                emit("job_rejected", file=name, error=str(e))
+                shutil.move(path, os.path.join(failed_dir, name))
+                continue
+            batch.append(job)
+            sources[job["id"]] = path
+        if batch:
+            for r in run_queue(batch, workers, executor, emit, caches, canoe_instances):
+                src = sources[r["id"]]
+                dest_dir = done_dir if r["status"] == "passed" else failed_dir
+                dest = os.path.join(dest_dir, os.path.basename(src))
+                shutil.move(src, dest)
+                with open(dest + ".result", "w", encoding="utf-8") as f:
+                    json.dump(r, f, ensure_ascii=False, indent=2)
+        if once:
+            return
+        time.sleep(poll)
+
+# ---------- CLI ----------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Headless CANoe campaign queue runner.")
+    ap.add_argument("--job", nargs=2, action="append", default=[], metavar=("CONFIG_XML", "SUITE_XML"),
+                    help="Add a job (repeatable).")
+    ap.add_argument("--queue", help="JSON lines file of jobs.")
+    ap.add_argument("--watch", metavar="DIR", help="Daemon mode: poll DIR for *.json job files.")
+    ap.add_argument("--poll", type=float, default=10.0, help="Daemon poll interval (s).")
+    ap.add_argument("--once", action="store_true", help="Daemon mode: process DIR once and exit.")
+    ap.add_argument("--workers", type=int, default=2, help="Concurrent jobs (SVN resolution).")
+    ap.add_argument("--canoe-instances", type=int, default=1, help="Concurrent CANoe executions.")
+    ap.add_argument("--dry-run", action="store_true", help="Resolve/export/validate only, do not open CANoe.")
+    ap.add_argument("--journal", metavar="DIR", help="Also record selections, runs and verdicts in this action journal.")
+    args = ap.parse_args(argv)
+
+    executor = dry_run_executor if args.dry_run else canoe_executor
+    emit = ProgressEmitter()
+    if args.journal:
+        from audit_log import AuditJournal
+        emit = journaled(emit, AuditJournal(args.journal))
+    if args.watch:
+        watch_queue_dir(args.watch, args.poll, args.workers, executor, emit,
+                        canoe_instances=args.canoe_instances, once=args.once)
+        return 0
+
+    raw_jobs = [{"config": c, "suite": s} for c, s in args.job]
+    if args.queue:
+        raw_jobs += load_queue_file(args.queue)
+    jobs = [normalize_job(j, i) for i, j in enumerate(raw_jobs, 1)]
+    if not jobs:
+        ap.error("no job given (use --job, --queue or --watch)")
+    results = run_queue(jobs, args.workers, executor, emit, canoe_instances=args.canoe_instances)
+    return 0 if all(r["status"] == "passed" for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
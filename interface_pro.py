@@ -8,11 +8,15 @@ from kivy.uix.button import Button
 from kivy.uix.image import Image
 from kivy.uix.popup import Popup
 from kivy.core.window import Window
+from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle, RoundedRectangle, Line
 from kivy.uix.widget import Widget
 from tkinter import Tk, filedialog
 import os
 
+from regression_suite import SuiteIndex
+from audit_log import get_journal
+
 # LEAR CORPORATE COLORS - Professional Design
 COLOR_LEAR_RED = (0.85, 0.05, 0.15, 1)      # Primary Brand Color
 COLOR_DARK_GRAY = (0.15, 0.15, 0.18, 1)     # Dark Professional Gray
@@ -24,6 +28,8 @@ COLOR_BORDER = (0.85, 0.85, 0.87, 1)        # Border Color
 COLOR_SUCCESS = (0.13, 0.55, 0.13, 1)       # Success Green
 COLOR_HOVER = (0.95, 0.08, 0.18, 1)         # Hover State
 
+SUITE_POLL_INTERVAL = 2.0                   # Suite XML hot-reload polling (s)
+
 # Configure window
 Window.size = (1200, 800)
 Window.title = "LEAR Corporation - Regression Test Framework"
@@ -101,6 +107,8 @@ class LearProfessionalApp(App):
         super().__init__(**kwargs)
         self.xml_loaded = False
         self.config_loaded = False
+        self.suite_index = None
+        self._suite_watch = None
     
     def build(self):
         """Build the professional interface"""
@@ -293,12 +301,25 @@ class LearProfessionalApp(App):
             font_size='15sp',
             halign='left',
             valign='top',
-            size_hint_y=0.85
+            size_hint_y=0.75
         )
         self.status_text.color = COLOR_TEXT_PRIMARY
         self.status_text.bind(size=self.status_text.setter('text_size'))
         self.status_card.add_widget(self.status_text)
         
+        # Suite summary (updated on hot-reload)
+        self.suite_info = Label(
+            text='',
+            markup=True,
+            font_size='13sp',
+            halign='left',
+            valign='top',
+            size_hint_y=0.1
+        )
+        self.suite_info.color = COLOR_TEXT_SECONDARY
+        self.suite_info.bind(size=self.suite_info.setter('text_size'))
+        self.status_card.add_widget(self.suite_info)
+        
         right_panel.add_widget(self.status_card)
         
         content.add_widget(right_panel)
@@ -388,6 +409,9 @@ class LearProfessionalApp(App):
         root.destroy()
         
         if filepath:
+            if not self._load_suite(filepath):
+                return
+            get_journal().record("import_xml", detail={"path": filepath})
             self.xml_loaded = True
             filename = os.path.basename(filepath)
             
@@ -429,6 +453,7 @@ class LearProfessionalApp(App):
         root.destroy()
         
         if filepath:
+            get_journal().record("import_config", detail={"path": filepath})
             self.config_loaded = True
             filename = os.path.basename(filepath)
             
@@ -462,6 +487,43 @@ class LearProfessionalApp(App):
             
             self._check_all_loaded()
     
+    def _load_suite(self, filepath):
+        """Parse the suite XML and start watching it for changes"""
+        if self._suite_watch is not None:
+            self._suite_watch.cancel()
+            self._suite_watch = None
+        index = SuiteIndex(filepath)
+        try:
+            suite = index.load()
+        except (OSError, ValueError) as e:  # SuiteIndex reports XML errors as ValueError
+            self.suite_info.text = f'[color=#D90D26][b]Invalid XML test file:[/b] {e}[/color]'
+            return False
+        self.suite_index = index
+        self.suite_info.text = (
+            f'[b]{len(suite["tests"])}[/b] tests in [b]{len(suite["categories"])}[/b] categories'
+            f' - watching for changes'
+        )
+        self._suite_watch = Clock.schedule_interval(self._poll_suite, SUITE_POLL_INTERVAL)
+        return True
+    
+    def _poll_suite(self, dt):
+        """Hot-reload: apply only the changed categories of the suite XML"""
+        try:
+            diff = self.suite_index.poll()
+        except (OSError, ValueError) as e:
+            self.suite_info.text = f'[color=#D90D26][b]Reload failed, keeping previous suite:[/b] {e}[/color]'
+            return
+        if not diff:
+            return
+        suite = self.suite_index.suite
+        changed = diff['categories']['added'] + diff['categories']['modified'] + diff['categories']['removed']
+        self.suite_info.text = (
+            f'[b]{len(suite["tests"])}[/b] tests in [b]{len(suite["categories"])}[/b] categories - '
+            f'reloaded: [color=#228B22]+{len(diff["added"])}[/color] '
+            f'[color=#D90D26]-{len(diff["removed"])}[/color] '
+            f'~{len(diff["modified"])} ({", ".join(changed) or ("metadata" if diff["metadata_changed"] else "no change")})'
+        )
+    
     def _check_all_loaded(self):
         """Check if all files are loaded and update status"""
         if self.xml_loaded and self.config_loaded:
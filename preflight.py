@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# preflight.py
+# -*- coding: utf-8 -*-
+"""
+Vérifications avant campagne ("Checks General Condition").
+
+Les checks sont enregistrés avec @register_check(name, ttl, timeout) et reçoivent
+un contexte {"config": config.xml, "suite": RegressionSuite.xml, ...}. Ils sont
+exécutés en parallèle; chaque résultat est publié dès qu'il est prêt (on_result)
+et mis en cache pendant son TTL, donc un second clic est immédiat.
+
+    python preflight.py --config config.xml --suite tests/RegressionSuite.xml
+"""
+import argparse, importlib.util, os, queue, shutil, subprocess, sys, threading, time
+from typing import Callable
+
+from SVN_Repo_Mang import run, resolve_from_xml, svn_list_xml, select_latest
+from regression_suite import parse_suite
+
+OK, WARN, FAIL, TIMEOUT, ERROR = "OK", "WARN", "FAIL", "TIMEOUT", "ERROR"
+
+# ---------- Registry ----------
+CHECKS: dict[str, dict] = {}
+
+def register_check(name: str, ttl: float = 60.0, timeout: float = 10.0):
+    """Décorateur: func(ctx) -> (status, message)."""
+    def deco(func: Callable[[dict], tuple[str, str]]):
+        CHECKS[name] = {"func": func, "ttl": ttl, "timeout": timeout}
+        return func
+    return deco
+
+# ---------- Built-in checks ----------
+@register_check("svn_reachable", ttl=60.0, timeout=15.0)
+def check_svn_reachable(ctx: dict) -> tuple[str, str]:
+    repo = resolve_from_xml(ctx["config"])[0]
+    run(["svn", "info", "--xml", "--non-interactive", repo], timeout=CHECKS["svn_reachable"]["timeout"])
+    return OK, f"{repo} reachable"
+
+@register_check("disk_space", ttl=30.0, timeout=5.0)
+def check_disk_space(ctx: dict) -> tuple[str, str]:
+    cache = resolve_from_xml(ctx["config"])[3]
+    path = os.path.abspath(cache)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:   # racine inexistante (ex. lecteur Z:\ non monté)
+            return FAIL, f"LocalCache {cache} is on a missing drive ({path})"
+        path = parent
+    free_gb = shutil.disk_usage(path).free / 1e9
+    min_gb = float(ctx.get("min_free_gb", 2.0))
+    status = OK if free_gb >= min_gb else FAIL
+    return status, f"{free_gb:.1f} GB free for LocalCache ({cache}), minimum {min_gb:g} GB"
+
+@register_check("config_freshness", ttl=120.0, timeout=20.0)
+def check_config_freshness(ctx: dict) -> tuple[str, str]:
+    repo, policy, pattern, cache = resolve_from_xml(ctx["config"])
+    chosen = select_latest(svn_list_xml(repo, timeout=CHECKS["config_freshness"]["timeout"]), policy, pattern)
+    if os.path.isfile(os.path.join(cache, chosen["name"])):
+        return OK, f"{chosen['name']} is up to date in LocalCache"
+    return WARN, f"newer configuration on SVN: {chosen['name']} (not exported yet)"
+
+@register_check("suite_valid", ttl=10.0, timeout=10.0)
+def check_suite_valid(ctx: dict) -> tuple[str, str]:
+    suite = parse_suite(ctx["suite"])
+    if not suite["tests"]:
+        return FAIL, "suite contains no test"
+    return OK, f"{len(suite['tests'])} tests in {len(suite['categories'])} categories"
+
+@register_check("canoe_available", ttl=300.0, timeout=10.0)
+def check_canoe_available(ctx: dict) -> tuple[str, str]:
+    if importlib.util.find_spec("py_canoe") is None:
+        return FAIL, "py_canoe is not installed"
+    if sys.platform != "win32":
+        return FAIL, "CANoe requires Windows (COM)"
+    import winreg  # type: ignore
+    try:
+        winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, "CANoe.Application").Close()
+    except OSError:
+        return FAIL, "CANoe.Application COM server is not registered"
+    return OK, "CANoe.Application registered"
+
+# ---------- Runner ----------
+class PreflightRunner:
+    """
+    Exécute les checks en parallèle avec timeout par check et cache TTL.
+    Chaque check tourne dans un thread démon: un check bloqué ne retarde pas la sortie
+    du programme. Un TIMEOUT est mis en cache timeout_ttl secondes et, tant que le thread
+    bloqué n'a pas fini, un nouveau clic l'attend au lieu d'en démarrer un autre.
+    """
+    def __init__(self, checks: dict[str, dict] | None = None, timeout_ttl: float = 15.0):
+        self.checks = CHECKS if checks is None else checks
+        self.timeout_ttl = timeout_ttl
+        self._cache: dict[tuple, tuple[float, dict]] = {}
+        self._running: dict[tuple, list[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _cache_key(self, name: str, ctx: dict) -> tuple:
+        return (name,) + tuple(sorted((k, str(v)) for k, v in ctx.items()))
+
+    def run(self, ctx: dict, on_result: Callable[[dict], None] | None = None,
+            names: list[str] | None = None) -> list[dict]:
+        """Retourne un résultat par check; on_result est appelé dès qu'un check se termine."""
+        on_result = on_result or (lambda r: None)
+        names = list(self.checks) if names is None else names
+        results: dict[str, dict] = {}
+        done: queue.Queue = queue.Queue()
+
+        # 1) Résultats encore valides dans le cache, sinon lancement (ou rattachement
+        #    à un thread encore en cours pour le même check)
+        pending = set()
+        started = time.monotonic()
+        for name in names:
+            key = self._cache_key(name, ctx)
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached and cached[0] > started:
+                    results[name] = dict(cached[1], cached=True)
+                else:
+                    pending.add(name)
+                    waiters = self._running.get(key)
+                    if waiters is None:
+                        self._running[key] = [done]
+                        threading.Thread(target=self._worker, args=(name, key, ctx), daemon=True,
+                                         name=f"preflight-{name}").start()
+                    else:
+                        waiters.append(done)
+            if name in results:
+                on_result(results[name])
+        if not pending:
+            return [results[n] for n in names]
+
+        # 2) Résultats publiés dans l'ordre de fin, jusqu'à l'échéance de chaque check
+        deadlines = {n: started + self.checks[n]["timeout"] for n in pending}
+        while pending:
+            timeout = max(0.0, min(deadlines[n] for n in pending) - time.monotonic())
+            try:
+                result = done.get(timeout=timeout)
+                if result["check"] in pending:
+                    pending.discard(result["check"])
+                    results[result["check"]] = result
+                    on_result(result)
+            except queue.Empty:
+                pass
+            for name in [n for n in pending if deadlines[n] <= time.monotonic()]:
+                pending.discard(name)
+                results[name] = {"check": name, "status": TIMEOUT, "cached": False,
+                                 "message": f"no answer after {self.checks[name]['timeout']:g} s",
+                                 "duration_s": round(time.monotonic() - started, 3)}
+                with self._lock:
+                    key = self._cache_key(name, ctx)
+                    if key in self._running:
+                        self._cache[key] = (time.monotonic() + self.timeout_ttl, results[name])
+                on_result(results[name])
+        return [results[n] for n in names]
+
+    def _worker(self, name: str, key: tuple, ctx: dict):
+        result = self._run_one(name, ctx)
+        with self._lock:
+            # un résultat tardif remplace le TIMEOUT en cache
+            if result["status"] in (OK, WARN, FAIL):
+                self._cache[key] = (time.monotonic() + self.checks[name]["ttl"], result)
+            waiters = self._running.pop(key, [])
+        for q in waiters:
+            q.put(result)
+
+    def _run_one(self, name: str, ctx: dict) -> dict:
+        t0 = time.monotonic()
+        try:
+            status, message = self.checks[name]["func"](ctx)
+        except subprocess.TimeoutExpired:
+            status, message = TIMEOUT, f"no answer after {self.checks[name]['timeout']:g} s"
+        except subprocess.CalledProcessError as e:
+            err = (e.stderr or "").strip()
+            status, message = FAIL, err.splitlines()[-1] if err else str(e)
+        except Exception as e:
+            status, message = ERROR, f"{type(e).__name__}: {e}"
+        return {"check": name, "status": status, "message": message, "cached": False,
+                "duration_s": round(time.monotonic() - t0, 3)}
+
+# ---------- CLI ----------
+def main(argv: list[str] | None = None) -> int:
+    from campaign_runner import ProgressEmitter
+    ap = argparse.ArgumentParser(description="Run campaign preflight checks.")
+    ap.add_argument("--config", default="config.xml", help="Campaign config XML.")
+    ap.add_argument("--suite", default="tests/RegressionSuite.xml", help="Regression suite XML.")
+    ap.add_argument("--check", action="append", choices=sorted(CHECKS), help="Run only this check (repeatable).")
+    ap.add_argument("--min-free-gb", type=float, default=2.0)
+    args = ap.parse_args(argv)
+
+    emit = ProgressEmitter()
+    ctx = {"config": args.config, "suite": args.suite, "min_free_gb": args.min_free_gb}
+    results = PreflightRunner().run(ctx, on_result=lambda r: emit("check", **r), names=args.check)
+    return 0 if all(r["status"] in (OK, WARN) for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# regression_suite.py
+# -*- coding: utf-8 -*-
+import hashlib, os, re, xml.etree.ElementTree as ET
+
+# ---------- Suite XML (tests/RegressionSuite.xml) ----------
+def parse_test(test_el: ET.Element, category: str = "") -> dict:
+    """Convertit un élément <test> en dict simple."""
+    def to_int(text: str | None, default: int = 0) -> int:
+        try:
+            return int((text or "").strip())
+        except ValueError:
+            return default
+
+    return {
+        "id": test_el.get("id", ""),
+        "priority": test_el.get("priority", ""),
+        "name": (test_el.findtext("name") or "").strip(),
+        "description": (test_el.findtext("description") or "").strip(),
+        "category": (test_el.findtext("category") or category).strip(),
+        "expected_result": (test_el.findtext("expected_result") or "").strip(),
+        "timeout": to_int(test_el.findtext("timeout")),
+        "retry_count": to_int(test_el.findtext("retry_count")),
+        "preconditions": [(p.text or "").strip() for p in test_el.findall("precondition")],
+    }
+
+def parse_suite(xml_path: str) -> dict:
+    """
+    Parse une suite de régression:
+    {"metadata": {...}, "categories": {name: [test, ...]}, "tests": {id: test}}
+    """
+    root = ET.parse(xml_path).getroot()
+    if root.tag != "regression_suite":
+        raise ValueError(f"Not a regression suite: <{root.tag}> in {xml_path}")
+    meta_el = root.find("metadata")
+    metadata = {}
+    if meta_el is not None:
+        metadata = {child.tag: (child.text or "").strip() for child in meta_el}
+
+    categories: dict[str, list[dict]] = {}
+    tests: dict[str, dict] = {}
+    for cat_el in root.findall("category"):
+        cat_name = cat_el.get("name", "")
+        if cat_name in categories:
+            raise ValueError(f"Duplicate category {cat_name!r} in {xml_path}")
+        cat_tests = [parse_test(t, cat_name) for t in cat_el.findall("test")]
+        categories[cat_name] = cat_tests
+        for t in cat_tests:
+            if t["id"] in tests:
+                raise ValueError(f"Duplicate test id {t['id']} in {xml_path}")
+            tests[t["id"]] = t
+    return {"metadata": metadata, "categories": categories, "tests": tests}
+
+# ---------- Hot-reload (diff par catégorie) ----------
+# balise ouvrante / fermante / auto-fermante (valeurs d'attributs entre guillemets, '>' permis)
+_TAG = re.compile(rb"<(/?)([A-Za-z_][\w.:-]*)(?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*\s*(/?)>")
+_IGNORED = re.compile(rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>", re.S)
+_PLACEHOLDER = b"<category/>"
+
+def _mask_ignored(data: bytes) -> bytes:
+    """Remplace commentaires et CDATA par des espaces (mêmes positions) pour la recherche."""
+    return _IGNORED.sub(lambda m: b" " * len(m.group(0)), data)
+
+def split_category_blocks(data: bytes) -> tuple[bytes, list[bytes]]:
+    """
+    Découpe le XML brut en (squelette, [bloc <category>...</category> ou <category .../>, ...])
+    en repérant seulement les balises (sans construire l'arbre). Les blocs sont les
+    <category> enfants directs de la racine, avec ou sans attribut name; le squelette est
+    le document où chaque bloc est remplacé par <category/> (entête, texte entre les blocs,
+    fin). Les balises en commentaire ou en CDATA sont ignorées.
+    """
+    masked = _mask_ignored(data)
+    spans, depth, start = [], 0, None
+    for m in _TAG.finditer(masked):
+        closing, name, self_closing = m.groups()
+        if closing:
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unexpected </{name.decode(errors='replace')}> at byte {m.start()}")
+            if depth == 1 and start is not None:
+                spans.append((start, m.end()))
+                start = None
+        elif self_closing:
+            if depth == 1 and name == b"category":
+                spans.append((m.start(), m.end()))
+        else:
+            if depth == 1 and name == b"category":
+                start = m.start()
+            depth += 1
+    if start is not None:
+        raise ValueError(f"Unterminated <category> block at byte {start}")
+    if not spans:
+        return data, []
+    blocks, skeleton, pos = [], [], 0
+    for start, end in spans:
+        skeleton += [data[pos:start], _PLACEHOLDER]
+        blocks.append(data[start:end])
+        pos = end
+    skeleton.append(data[pos:])
+    return b"".join(skeleton), blocks
+
+def empty_diff() -> dict:
+    return {"added": [], "removed": [], "modified": [],
+            "categories": {"added": [], "removed": [], "modified": []}, "metadata_changed": False}
+
+class SuiteIndex:
+    """
+    Suite chargée en mémoire + rechargement incrémental.
+    poll() détecte un changement (mtime/taille puis hash), ne re-parse que les blocs
+    <category> dont le hash a changé (et le squelette du document s'il a changé) et
+    applique le diff aux index 'categories'/'tests'. Résultat identique à parse_suite().
+    """
+    def __init__(self, xml_path: str):
+        self.path = xml_path
+        self.suite = {"metadata": {}, "categories": {}, "tests": {}}
+        self._stat: tuple[int, int] | None = None
+        self._file_hash = ""
+        self._header_hash = ""
+        self._block_hashes: dict[str, str] = {}
+        self._test_category: dict[str, str] = {}
+        self._failed = False
+
+    def load(self) -> dict:
+        """Chargement initial (toutes les catégories sont 'ajoutées')."""
+        self.suite = {"metadata": {}, "categories": {}, "tests": {}}
+        self._stat, self._file_hash, self._header_hash = None, "", ""
+        self._block_hashes, self._test_category, self._failed = {}, {}, False
+        self.poll()
+        return self.suite
+
+    def poll(self) -> dict | None:
+        """
+        Retourne le diff appliqué, ou None si le fichier n'a pas changé. Après un échec,
+        un retour au dernier contenu appliqué donne un diff vide (efface l'erreur affichée).
+        """
+        st = os.stat(self.path)
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat == self._stat:
+            return None
+        with open(self.path, "rb") as f:
+            data = f.read()
+        file_hash = hashlib.sha1(data).hexdigest()
+        if file_hash == self._file_hash:
+            self._stat = stat
+            if self._failed:   # retour au contenu appliqué après une édition invalide
+                self._failed = False
+                return empty_diff()
+            return None
+        try:
+            diff = self._apply(data)
+        except Exception:
+            self._failed = True
+            raise
+        self._stat, self._file_hash, self._failed = stat, file_hash, False
+        return diff
+
+    def _apply(self, data: bytes) -> dict:
+        try:
+            return self._apply_blocks(data)
+        except ET.ParseError as e:   # SyntaxError: signalée comme ValueError à l'appelant
+            raise ValueError(f"Invalid XML in {self.path}: {e}") from e
+
+    def _apply_blocks(self, data: bytes) -> dict:
+        skeleton, blocks = split_category_blocks(data)
+
+        # 1) Parse uniquement le squelette et les blocs modifiés (rien n'est appliqué si
+        #    l'un d'eux est invalide; un bloc inchangé a déjà été validé)
+        header_hash = hashlib.sha1(skeleton.replace(b"\r\n", b"\n")).hexdigest()
+        metadata = self.suite["metadata"]
+        if header_hash != self._header_hash:
+            root = ET.fromstring(skeleton)
+            if root.tag != "regression_suite":
+                raise ValueError(f"Not a regression suite: <{root.tag}> in {self.path}")
+            children = root.findall("category")
+            if len(children) != len(blocks) or any(c.attrib or len(c) for c in children):
+                raise ValueError(f"<category> blocks must be direct children of <regression_suite> in {self.path}")
+            meta_el = root.find("metadata")
+            metadata = {c.tag: (c.text or "").strip() for c in meta_el} if meta_el is not None else {}
+
+        known = {h: n for n, h in self._block_hashes.items()}
+        new_hashes: dict[str, str] = {}
+        parsed: dict[str, list[dict]] = {}
+        for block in blocks:
+            # hash insensible aux fins de ligne (CRLF/LF selon l'éditeur)
+            h = hashlib.sha1(block.replace(b"\r\n", b"\n")).hexdigest()
+            cat_el = None
+            name = known.get(h)
+            if name is None:
+                cat_el = ET.fromstring(block)
+                name = cat_el.get("name", "")
+            if name in new_hashes:
+                raise ValueError(f"Duplicate category {name!r} in {self.path}")
+            new_hashes[name] = h
+            if cat_el is not None:
+                parsed[name] = [parse_test(t, name) for t in cat_el.findall("test")]
+
+        # 2) Calcul du diff
+        removed_cats = [n for n in self._block_hashes if n not in new_hashes]
+        added_cats = [n for n in parsed if n not in self._block_hashes]
+        modified_cats = [n for n in parsed if n in self._block_hashes]
+        old_ids: dict[str, dict] = {}
+        for n in removed_cats + modified_cats:
+            old_ids.update((t["id"], t) for t in self.suite["categories"][n])
+        new_ids: dict[str, dict] = {}
+        for n, tests in parsed.items():
+            for t in tests:
+                owner = self._test_category.get(t["id"])
+                if t["id"] in new_ids or (owner is not None and owner in new_hashes and owner not in parsed):
+                    raise ValueError(f"Duplicate test id {t['id']} in {self.path}")
+                new_ids[t["id"]] = t
+        diff = {
+            "added": sorted(i for i in new_ids if i not in old_ids),
+            "removed": sorted(i for i in old_ids if i not in new_ids),
+            "modified": sorted(i for i in new_ids if i in old_ids and new_ids[i] != old_ids[i]),
+            "categories": {"added": added_cats, "removed": removed_cats, "modified": modified_cats},
+            "metadata_changed": metadata != self.suite["metadata"],
+        }
+
+        # 3) Application aux index
+        cats, tests = self.suite["categories"], self.suite["tests"]
+        for n in removed_cats + modified_cats:
+            for t in cats.pop(n):
+                tests.pop(t["id"], None)
+                self._test_category.pop(t["id"], None)
+        for n, cat_tests in parsed.items():
+            cats[n] = cat_tests
+            for t in cat_tests:
+                tests[t["id"]] = t
+                self._test_category[t["id"]] = n
+        # conserve l'ordre du fichier
+        self.suite["categories"] = {n: cats[n] for n in new_hashes}
+        self.suite["metadata"] = metadata
+        self._block_hashes, self._header_hash = new_hashes, header_hash
+        return diff
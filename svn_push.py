@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# svn_push.py
+# -*- coding: utf-8 -*-
+"""
+"Push": envoi des rapports, logs et configs vers SVN en UN commit atomique.
+
+1. stage   : copie des artefacts dans _push_stage/<push_id>/ + manifest.json (sha1, taille)
+2. plan    : un 'svn list -R --xml' de la cible; les fichiers identiques au dernier push
+             (même sha1 et même révision distante) sont ignorés
+3. commit  : un seul appel svnmucc (mkdir/put) -> une révision
+Avant l'envoi, la révision HEAD (base_rev) est notée dans le manifest. Si le commit
+échoue, le dossier de staging reste: resume(push_id) vérifie d'abord (svn log
+-r base_rev:HEAD --search) que le commit n'est pas déjà passé, puis renvoie les
+fichiers stagés. discard(push_id) abandonne un push stagé.
+
+Config XML (optionnel, à côté de SVN_Path):
+    <PushURL>https://svn/.../results</PushURL>
+    <PushArtifacts>
+        <Artifact src="reports/*.html" dest="reports"/>
+        <Artifact src="_cache_configs/*.cfx" dest="configs"/>
+    </PushArtifacts>
+
+Test local: svnadmin create /tmp/repo && svn mkdir -m init file:///tmp/repo/results
+            python svn_push.py --url file:///tmp/repo/results --file report.html reports
+"""
+import argparse, glob, hashlib, json, os, posixpath, shutil, sys, time, uuid
+import xml.etree.ElementTree as ET
+
+from SVN_Repo_Mang import run, ensure_dir, svn_list_tree, svnmucc_commit
+
+DEFAULT_STAGE_ROOT = "./_push_stage"
+STATE_FILE = "push_state.json"
+SVN_TIMEOUT = 300.0   # s, par appel svn/svnmucc (un serveur injoignable ne bloque pas indéfiniment)
+
+class PendingPushError(RuntimeError):
+    """Un push stagé vers la même URL n'est pas encore passé (à reprendre ou abandonner)."""
+
+# ---------- Config ----------
+def resolve_push_from_xml(xml_path: str) -> tuple[str, list[tuple[str, str]]]:
+    """Retourne (PushURL, [(fichier local, chemin distant relatif)])."""
+    root = ET.parse(xml_path).getroot()
+    url = (root.findtext("./PushURL") or "").strip()
+    if not url:
+        raise ValueError("PushURL missing in XML.")
+    artifacts = []
+    for art in root.findall("./PushArtifacts/Artifact"):
+        dest_dir = (art.get("dest") or "").strip("/")
+        for src in sorted(glob.glob(art.get("src", ""))):
+            if os.path.isfile(src):
+                artifacts.append((src, posixpath.join(dest_dir, os.path.basename(src))))
+    return url, artifacts
+
+# ---------- Helpers ----------
+def sha1_file(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _load_json(path: str, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _save_json(path: str, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+# ---------- Pipeline ----------
+def stage(base_url: str, artifacts: list[tuple[str, str]], message: str,
+          stage_root: str = DEFAULT_STAGE_ROOT) -> dict:
+    """Copie les artefacts dans un dossier de staging et écrit le manifest."""
+    push_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    stage_dir = ensure_dir(os.path.join(stage_root, push_id))
+    files = {}
+    for src, dest in artifacts:
+        dest = dest.replace("\\", "/").strip("/")
+        local = os.path.join(stage_dir, "files", *dest.split("/"))
+        ensure_dir(os.path.dirname(local))
+        shutil.copy2(src, local)
+        files[dest] = {"src": src, "local": local, "sha1": sha1_file(local), "size": os.path.getsize(local)}
+    manifest = {"push_id": push_id, "url": base_url.rstrip("/"), "message": message, "files": files}
+    _save_json(os.path.join(stage_dir, "manifest.json"), manifest)
+    return manifest
+
+def plan(manifest: dict, remote: dict[str, dict], state: dict) -> dict:
+    """Calcule les mkdir/put nécessaires; ignore les fichiers inchangés depuis le dernier push."""
+    known = state.get(manifest["url"], {})
+    puts, skipped = [], []
+    for dest, f in sorted(manifest["files"].items()):
+        prev = known.get(dest)
+        if prev and prev["sha1"] == f["sha1"] and remote.get(dest, {}).get("revision") == prev["revision"]:
+            skipped.append(dest)
+        else:
+            puts.append(dest)
+    mkdirs = set()
+    for dest in puts:
+        parent = posixpath.dirname(dest)
+        while parent and remote.get(parent, {}).get("kind") != "dir":
+            mkdirs.add(parent)
+            parent = posixpath.dirname(parent)
+    return {"mkdirs": sorted(mkdirs, key=lambda d: (d.count("/"), d)), "puts": puts, "skipped": skipped}
+
+def _head_revision(url: str, timeout: float | None = SVN_TIMEOUT) -> int:
+    out = run(["svn", "info", "--xml", "--non-interactive", url], timeout=timeout)
+    return int(ET.fromstring(out).find("entry").get("revision"))
+
+def _find_committed(manifest: dict, timeout: float | None = SVN_TIMEOUT) -> int | None:
+    """
+    Révision d'un commit déjà passé pour ce push (message contenant le push_id), cherchée
+    dans toutes les révisions depuis base_rev (sans base_rev: tout l'historique de l'URL).
+    """
+    cmd = ["svn", "log", "--xml", "--non-interactive", "--search", manifest["push_id"]]
+    if manifest.get("base_rev") is not None:
+        cmd += ["-r", f"{manifest['base_rev']}:HEAD"]
+    out = run(cmd + [manifest["url"] + "@HEAD"], timeout=timeout)
+    entry = ET.fromstring(out).find("logentry")
+    return int(entry.get("revision")) if entry is not None else None
+
+def commit(manifest: dict, stage_root: str = DEFAULT_STAGE_ROOT, check_previous: bool = False,
+           timeout: float | None = SVN_TIMEOUT) -> dict:
+    """Envoie un manifest stagé en un seul commit; met à jour l'état de dédup et nettoie le staging."""
+    stage_dir = os.path.join(stage_root, manifest["push_id"])
+    state_path = os.path.join(stage_root, STATE_FILE)
+    state = _load_json(state_path, {})
+    report = {"push_id": manifest["push_id"], "url": manifest["url"], "files": len(manifest["files"]),
+              "uploaded": 0, "skipped": 0, "upload_bytes": 0, "round_trips": 0, "revision": None}
+
+    revision = None
+    if check_previous and "puts" in manifest:   # sans "puts", rien n'a jamais été envoyé
+        report["round_trips"] += 1
+        revision = _find_committed(manifest, timeout)
+    if revision is None:
+        remote = svn_list_tree(manifest["url"], timeout=timeout)
+        report["round_trips"] += 1
+        ops = plan(manifest, remote, state)
+        report["skipped"] = len(ops["skipped"])
+        if ops["puts"]:
+            # mémorisé avant l'envoi: resume() sait quels fichiers ce commit contenait
+            # et à partir de quelle révision chercher s'il est passé
+            manifest["base_rev"] = _head_revision(manifest["url"], timeout)
+            report["round_trips"] += 1
+            manifest["puts"] = ops["puts"]
+            _save_json(os.path.join(stage_dir, "manifest.json"), manifest)
+            actions = []
+            for d in ops["mkdirs"]:
+                actions += ["mkdir", d]
+            for dest in ops["puts"]:
+                actions += ["put", manifest["files"][dest]["local"], dest]
+            revision = svnmucc_commit(manifest["url"], actions,
+                                      f"[push {manifest['push_id']}] {manifest['message']}", timeout=timeout)
+            report["round_trips"] += 1
+            report["uploaded"] = len(ops["puts"])
+            report["upload_bytes"] = sum(manifest["files"][d]["size"] for d in ops["puts"])
+        pushed = ops["puts"]
+    else:
+        pushed = manifest.get("puts", list(manifest["files"]))
+        report["uploaded"] = len(pushed)
+        report["upload_bytes"] = sum(manifest["files"][d]["size"] for d in pushed)
+
+    known = state.setdefault(manifest["url"], {})
+    for dest in pushed:
+        known[dest] = {"sha1": manifest["files"][dest]["sha1"], "revision": revision}
+    _save_json(state_path, state)
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    report["revision"] = revision
+    report["status"] = "committed" if revision is not None else "up_to_date"
+    return report
+
+def push(base_url: str, artifacts: list[tuple[str, str]], message: str,
+         stage_root: str = DEFAULT_STAGE_ROOT, timeout: float | None = SVN_TIMEOUT) -> dict:
+    """
+    stage + commit. En cas d'erreur, le staging est conservé (voir resume). Tant qu'un push
+    stagé vers la même URL n'est pas passé, rien n'est stagé (PendingPushError): des clics
+    répétés pendant que le serveur est injoignable ne multiplient pas les copies.
+    """
+    pending = pending_pushes(stage_root, base_url)
+    if pending:
+        raise PendingPushError(f"Push {', '.join(pending)} to {base_url} is still pending: "
+                               "resume or discard it first")
+    return commit(stage(base_url, artifacts, message, stage_root), stage_root, timeout=timeout)
+
+def pending_pushes(stage_root: str = DEFAULT_STAGE_ROOT, url: str | None = None) -> list[str]:
+    """Push stagés non passés (optionnellement seulement ceux vers url)."""
+    if not os.path.isdir(stage_root):
+        return []
+    ids = []
+    for d in sorted(os.listdir(stage_root)):
+        path = os.path.join(stage_root, d, "manifest.json")
+        if not os.path.isfile(path):
+            continue
+        if url is not None and _load_json(path, {}).get("url") != url.rstrip("/"):
+            continue
+        ids.append(d)
+    return ids
+
+def resume(push_id: str, stage_root: str = DEFAULT_STAGE_ROOT, timeout: float | None = SVN_TIMEOUT) -> dict:
+    """Reprend un push interrompu à partir de son staging."""
+    manifest = _load_json(os.path.join(stage_root, push_id, "manifest.json"), None)
+    if manifest is None:
+        raise FileNotFoundError(f"No staged push {push_id} in {stage_root}")
+    return commit(manifest, stage_root, check_previous=True, timeout=timeout)
+
+def discard(push_id: str, stage_root: str = DEFAULT_STAGE_ROOT) -> bool:
+    """Abandonne un push stagé (supprime son staging). Retourne False s'il n'existe pas."""
+    stage_dir = os.path.join(stage_root, push_id)
+    if not os.path.isfile(os.path.join(stage_dir, "manifest.json")):
+        return False
+    shutil.rmtree(stage_dir)
+    return True
+
+# ---------- CLI ----------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Push results and configs to SVN in one atomic commit.")
+    ap.add_argument("--config", help="Config XML with PushURL / PushArtifacts.")
+    ap.add_argument("--url", help="Target SVN folder (overrides PushURL).")
+    ap.add_argument("--file", nargs=2, action="append", default=[], metavar=("SRC", "DEST_DIR"),
+                    help="Extra artifact (repeatable).")
+    ap.add_argument("-m", "--message", default="Regression results")
+    ap.add_argument("--stage-root", default=DEFAULT_STAGE_ROOT)
+    ap.add_argument("--timeout", type=float, default=SVN_TIMEOUT, help="Timeout of each svn call (s).")
+    ap.add_argument("--resume", metavar="PUSH_ID", help="Resume a failed push ('all' for every pending one).")
+    ap.add_argument("--discard", metavar="PUSH_ID", help="Drop a staged push without sending it.")
+    ap.add_argument("--list", action="store_true", help="List staged (pending) pushes.")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        print(json.dumps(pending_pushes(args.stage_root)))
+        return 0
+    if args.discard:
+        return 0 if discard(args.discard, args.stage_root) else 1
+    if args.resume:
+        ids = pending_pushes(args.stage_root) if args.resume == "all" else [args.resume]
+        failed = 0
+        for push_id in ids:
+            try:
+                print(json.dumps(resume(push_id, args.stage_root, args.timeout)))
+            except Exception as e:
+                failed += 1
+                print(json.dumps({"push_id": push_id, "status": "failed", "error": f"{type(e).__name__}: {e}"}))
+        return 1 if failed else 0
+
+    url, artifacts = (resolve_push_from_xml(args.config) if args.config else ("", []))
+    url = args.url or url
+    if not url:
+        ap.error("no target URL (use --url or PushURL in --config)")
+    artifacts += [(src, posixpath.join(dest.strip("/"), os.path.basename(src))) for src, dest in args.file]
+    if not artifacts:
+        ap.error("nothing to push")
+    print(json.dumps(push(url, artifacts, args.message, args.stage_root, args.timeout)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
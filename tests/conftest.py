@@ -0,0 +1,6 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+import os, sys
+
+# les modules sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+# tests/test_audit_log.py
+# -*- coding: utf-8 -*-
+import os, subprocess, sys
+
+import pytest
+
+from audit_log import AuditJournal, JournalReadOnly
+
+def _fill(journal, n):
+    for i in range(n):
+        journal.record("run", operator=f"op{i % 3}", test_id=f"T{i % 5}", detail={"i": i})
+
+def test_reopen_uses_sealed_indexes(tmp_path):
+    j = AuditJournal(str(tmp_path), segment_bytes=1000, compact_every=0)
+    _fill(j, 100)
+    j.close()
+    assert any(name.endswith(".idx") for name in os.listdir(tmp_path))
+    j2 = AuditJournal(str(tmp_path), compact_every=0)
+    assert len(j2) == 100
+    assert j2.query(limit=1)[1][0]["detail"] == {"i": 99}
+
+def test_torn_tail_is_truncated_by_writer_only(tmp_path):
+    j = AuditJournal(str(tmp_path))
+    _fill(j, 10)
+    active = j._segments[-1].path
+    j.close()
+    size = os.path.getsize(active)
+    with open(active, "ab") as f:
+        f.write(b"\x40\x00\x00\x00garbage")
+    reader = AuditJournal(str(tmp_path), read_only=True)
+    assert len(reader) == 10
+    assert os.path.getsize(active) == size + 11
+    with pytest.raises(JournalReadOnly):
+        reader.record("x")
+    writer = AuditJournal(str(tmp_path))
+    assert os.path.getsize(active) == size
+    writer.record("after")
+    writer.close()
+    assert len(AuditJournal(str(tmp_path), read_only=True)) == 11
+
+def test_query_paging_and_filters(tmp_path):
+    j = AuditJournal(str(tmp_path), segment_bytes=800, compact_every=0)
+    _fill(j, 60)
+    total, rows = j.query(operator="op1", limit=5)
+    assert total == 20
+    assert [r["detail"]["i"] for r in rows] == [58, 55, 52, 49, 46]
+    total, rows = j.query(operator="op1", test_id="T3", offset=1, limit=10)
+    assert total == 4
+    assert [r["detail"]["i"] for r in rows] == [43, 28, 13]
+    mid = j.query(limit=60)[1][30]["ts"]
+    assert j.query(t_start=mid, limit=0)[0] == 31
+    assert j.query(operator="nobody") == (0, [])
+
+def test_compact_merges_and_keeps_order(tmp_path):
+    j = AuditJournal(str(tmp_path), segment_bytes=500, compact_every=0)
+    _fill(j, 80)
+    before = j.query(limit=80)[1]
+    sealed = len(j._segments) - 1
+    assert j.compact(target_bytes=1 << 20) == sealed
+    assert len(j._segments) == 2
+    assert j.query(limit=80)[1] == before
+    j.close()
+    j2 = AuditJournal(str(tmp_path), read_only=True)
+    assert j2.query(limit=80)[1] == before
+    assert j2.query(test_id="T2")[0] == 16
+
+def test_background_compaction(tmp_path):
+    j = AuditJournal(str(tmp_path), segment_bytes=300, compact_every=3)
+    _fill(j, 60)
+    j.close()
+    assert any(s.first != s.last for s in j._segments)
+    assert len(AuditJournal(str(tmp_path), read_only=True)) == 60
+
+_WRITER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from audit_log import AuditJournal
+j = AuditJournal(sys.argv[2], segment_bytes=2000, compact_every=2)
+for i in range(200):
+    j.record("run", operator=sys.argv[3], detail={"i": i})
+j.close()
+"""
+
+def test_concurrent_processes(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    procs = [subprocess.Popen([sys.executable, "-c", _WRITER, root, str(tmp_path), op]) for op in ("a", "b")]
+    assert [p.wait(timeout=60) for p in procs] == [0, 0]
+    j = AuditJournal(str(tmp_path), read_only=True)
+    for op in ("a", "b"):
+        total, rows = j.query(operator=op, limit=200)
+        assert total == 200
+        assert sorted(r["detail"]["i"] for r in rows) == list(range(200))
@@ -0,0 +1,230 @@
+# tests/test_campaign_runner.py
+# -*- coding: utf-8 -*-
+import io, json, os, sys, threading, time, types
+
+import pytest
+
+import campaign_runner
+from campaign_runner import (canoe_executor, measurement_budget, run_queue, watch_queue_dir,
+                             ProgressEmitter, SharedCaches)
+
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "RegressionSuite.xml")
+
+class _FakeCANoe:
+    """CANoe simulé: la mesure s'arrête seule après 'duration' secondes."""
+    duration = 0.3
+    log: list = []
+
+    def open(self, **kwargs):
+        self.log.append("open")
+
+    def compile_all_capl_nodes(self):
+        pass
+
+    def start_measurement(self):
+        self.log.append("start")
+        self.stop_at = time.monotonic() + self.duration
+        return True
+
+    def get_measurement_running_status(self):
+        return time.monotonic() < self.stop_at
+
+    def stop_measurement(self):
+        self.log.append("stop")
+        self.stop_at = 0.0
+        return True
+
+    def quit(self):
+        self.log.append("quit")
+
+def _suite(timeout=0):
+    return {"tests": {"T1": {"timeout": timeout, "retry_count": 0}}}
+
+def test_executor_waits_for_measurement_end(monkeypatch):
+    monkeypatch.setitem(sys.modules, "py_canoe", types.SimpleNamespace(CANoe=_FakeCANoe))
+    monkeypatch.setattr(_FakeCANoe, "log", [])
+    monkeypatch.setattr("SVN_Repo_Mang.time.sleep", lambda s, _sleep=time.sleep: _sleep(0.01))
+    t0 = time.monotonic()
+    canoe_executor("cfg.cfx", _suite())
+    assert time.monotonic() - t0 >= _FakeCANoe.duration
+    assert _FakeCANoe.log == ["open", "start", "stop", "quit"]
+
+def test_executor_stops_after_budget(monkeypatch):
+    monkeypatch.setitem(sys.modules, "py_canoe", types.SimpleNamespace(CANoe=_FakeCANoe))
+    monkeypatch.setattr(_FakeCANoe, "log", [])
+    monkeypatch.setattr(_FakeCANoe, "duration", 60.0)
+    monkeypatch.setattr(campaign_runner, "MEASUREMENT_MARGIN_S", 0.0)
+    monkeypatch.setattr("SVN_Repo_Mang.time.sleep", lambda s, _sleep=time.sleep: _sleep(0.01))
+    suite = {"tests": {"T1": {"timeout": 0.1, "retry_count": 1}}}
+    assert measurement_budget(suite) == 0.2
+    try:
+        canoe_executor("cfg.cfx", suite)
+        raise AssertionError("expected RuntimeError")
+    except RuntimeError as e:
+        assert "still running" in str(e)
+    assert _FakeCANoe.log[-2:] == ["stop", "quit"]
+
+def test_failed_open_is_not_masked_by_cleanup(monkeypatch):
+    class BrokenOpen(_FakeCANoe):
+        def open(self, **kwargs):
+            raise OSError("cfg not found")
+
+        def stop_measurement(self):
+            raise AttributeError("no measurement")
+
+        def quit(self):
+            self.log.append("quit")
+
+    monkeypatch.setitem(sys.modules, "py_canoe", types.SimpleNamespace(CANoe=BrokenOpen))
+    monkeypatch.setattr(_FakeCANoe, "log", [])
+    with pytest.raises(OSError, match="cfg not found"):
+        canoe_executor("cfg.cfx", _suite())
+    assert _FakeCANoe.log == []   # rien d'ouvert: ni stop ni quit
+
+# ---------- Queue, caches partagés, progression ----------
+class _FakeSvn:
+    """svn_list_xml / svn_export_file simulés: contenu exporté = url + date courante."""
+    def __init__(self):
+        self.listing = {}
+        self.exports = []
+        self._lock = threading.Lock()
+
+    def list(self, repo_url, timeout=None):
+        return [dict(e) for e in self.listing[repo_url]]
+
+    def export(self, file_url, dest_folder):
+        with self._lock:
+            self.exports.append(file_url)
+        os.makedirs(dest_folder, exist_ok=True)
+        local = os.path.join(dest_folder, os.path.basename(file_url))
+        date = next(e["date"] for entries in self.listing.values() for e in entries if e["url"] == file_url)
+        with open(local, "w", encoding="utf-8") as f:
+            f.write(f"{file_url}@{date}")
+        return local
+
+@pytest.fixture
+def svn(monkeypatch):
+    fake = _FakeSvn()
+    monkeypatch.setattr(campaign_runner, "svn_list_xml", fake.list)
+    monkeypatch.setattr(campaign_runner, "svn_export_file", fake.export)
+    return fake
+
+def _entry(repo, name, date):
+    return {"name": name, "url": f"{repo}/{name}", "date": date}
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_export_cache_never_shares_a_file(tmp_path, svn):
+    cache, caches = str(tmp_path / "cache"), SharedCaches()
+    r1, r2 = _entry("svn://r1", "SGW_1.6.0.cfx", "d1"), _entry("svn://r2", "SGW_1.6.0.cfx", "d1")
+    svn.listing = {"svn://r1": [r1], "svn://r2": [r2]}
+    p1 = caches.export(r1, cache)
+    p2 = caches.export(r2, cache)
+    assert p1 != p2
+    assert caches.export(r1, cache) == p1 and _read(p1) == "svn://r1/SGW_1.6.0.cfx@d1"
+    assert caches.stats["export_hits"] == 1
+
+    # nouvelle révision sur le serveur: nouvel emplacement, l'ancien fichier (ouvert par un job) intact
+    svn.listing["svn://r1"] = [dict(r1, date="d2")]
+    p3 = caches.export(dict(r1, date="d2"), cache)
+    assert p3 != p1 and _read(p1).endswith("@d1") and _read(p3).endswith("@d2")
+
+def test_export_hit_checks_file_identity(tmp_path, svn):
+    cache, caches = str(tmp_path / "cache"), SharedCaches()
+    e = _entry("svn://r1", "A.cfx", "d1")
+    svn.listing = {"svn://r1": [e]}
+    path = caches.export(e, cache)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("overwritten by someone else")
+    assert _read(caches.export(e, cache)) == "svn://r1/A.cfx@d1"
+    assert (caches.stats["export_hits"], caches.stats["export_misses"]) == (0, 2)
+
+def _config(tmp_path, name, repo):
+    path = tmp_path / f"{name}.xml"
+    path.write_text(f"<config><SVN_Path>{repo}</SVN_Path><SelectionPolicy>latest</SelectionPolicy>"
+                    f"<LocalCache>{tmp_path / 'cache'}</LocalCache></config>", encoding="utf-8")
+    return str(path)
+
+class _StubExecutor:
+    """Exécuteur factice: mesure la concurrence des exécutions."""
+    def __init__(self, duration=0.05, fail_cfg=None):
+        self.duration, self.fail_cfg = duration, fail_cfg
+        self.running = self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, cfg, suite):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.duration)
+            if self.fail_cfg and self.fail_cfg in _read(cfg):
+                raise RuntimeError("measurement failed")
+        finally:
+            with self._lock:
+                self.running -= 1
+
+def test_run_queue_shares_caches_and_limits_canoe_slots(tmp_path, svn):
+    svn.listing = {"svn://r1": [_entry("svn://r1", "SGW_1.5.0.cfx", "2026-01-01T00:00:00Z"),
+                                _entry("svn://r1", "SGW_1.6.0.cfx", "2026-02-01T00:00:00Z")]}
+    cfg = _config(tmp_path, "config", "svn://r1")
+    jobs = [{"id": f"j{i}", "config": cfg, "suite": SUITE} for i in range(6)]
+    executor, out = _StubExecutor(), io.StringIO()
+    results = run_queue(jobs, workers=6, executor=executor, emit=ProgressEmitter(out), canoe_instances=2)
+
+    assert [r["status"] for r in results] == ["passed"] * 6
+    assert executor.max_running == 2
+    assert svn.exports == ["svn://r1/SGW_1.6.0.cfx"]
+    assert len({r["cfg"] for r in results}) == 1
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert events[0]["event"] == "queue_started" and events[-1]["event"] == "queue_finished"
+    assert events[-1]["cache"] == {"list_hits": 5, "list_misses": 1, "export_hits": 5, "export_misses": 1}
+    for job in jobs:
+        kinds = [e["event"] for e in events if e.get("job") == job["id"]]
+        assert kinds == ["job_started", "config_selected", "suite_loaded",
+                         "execution_started", "execution_finished", "job_finished"]
+
+def test_watch_queue_dir_moves_jobs(tmp_path, svn):
+    svn.listing = {"svn://ok": [_entry("svn://ok", "OK_1.0.0.cfx", "d1")],
+                   "svn://ko": [_entry("svn://ko", "KO_1.0.0.cfx", "d1")]}
+    queue = tmp_path / "queue"
+    queue.mkdir()
+    for name, repo in (("good", "svn://ok"), ("broken", "svn://ko")):
+        (queue / f"{name}.json").write_text(json.dumps({"config": _config(tmp_path, name, repo), "suite": SUITE}))
+    (queue / "invalid.json").write_text(json.dumps({"config": "x.xml"}))
+    out = io.StringIO()
+    watch_queue_dir(str(queue), executor=_StubExecutor(0, fail_cfg="KO_"), emit=ProgressEmitter(out), once=True)
+
+    assert sorted(os.listdir(queue / "done")) == ["good.json", "good.json.result"]
+    assert sorted(os.listdir(queue / "failed")) == ["broken.json", "broken.json.result", "invalid.json"]
+    with open(queue / "failed" / "broken.json.result", encoding="utf-8") as f:
+        result = json.load(f)
+    assert result["stage"] == "execute" and "measurement failed" in result["error"]
+    assert any(json.loads(l)["event"] == "job_rejected" for l in out.getvalue().splitlines())
+
+@pytest.mark.parametrize("checks, failed", [
+    ({"TST_SEC_002": {"type": "not_forwarded", "source": {"channel": 1, "id_range": ["0x700", "0x7FF"]},
+                      "target": {"channel": 2}}}, None),
+    ({"TST_SEC_002": {"type": "not_forwarded", "source": {"channel": 3}, "target": {"channel": 2}}},
+     ["TST_SEC_002"]),                                                   # INCONCLUSIVE
+    ({"TST_SEC_02": {"type": "present", "filter": {"channel": 1}}}, "unknown test id"),
+])
+def test_run_job_verdicts(tmp_path, svn, checks, failed):
+    pytest.importorskip("numpy")
+    from trace_analysis import write_synthetic_asc
+    svn.listing = {"svn://r1": [_entry("svn://r1", "SGW_1.6.0.cfx", "d1")]}
+    trace = write_synthetic_asc(str(tmp_path / "gw.asc"), 2000, seed=3)
+    checks_path = tmp_path / "checks.json"
+    checks_path.write_text(json.dumps(checks))
+    job = {"id": "j", "config": _config(tmp_path, "config", "svn://r1"), "suite": SUITE,
+           "trace": trace, "checks": str(checks_path)}
+    result = run_queue([job], executor=campaign_runner.dry_run_executor, emit=ProgressEmitter(io.StringIO()))[0]
+    if failed is None:
+        assert result["status"] == "passed"
+    elif isinstance(failed, list):
+        assert result["status"] == "failed" and result["failed_tests"] == failed
+    else:
+        assert result["status"] == "failed" and result["stage"] == "verdict" and failed in result["error"]
@@ -0,0 +1,49 @@
+# tests/test_preflight.py
+# -*- coding: utf-8 -*-
+import os, subprocess, sys, threading, time
+
+import preflight
+from preflight import PreflightRunner, OK, FAIL, TIMEOUT
+
+def test_disk_space_missing_root(monkeypatch):
+    monkeypatch.setattr(preflight, "resolve_from_xml", lambda path: ("", "", "", "/cache"))
+    monkeypatch.setattr(preflight.os.path, "exists", lambda p: False)
+    status, message = preflight.check_disk_space({"config": "config.xml"})
+    assert status == FAIL and "missing drive" in message
+
+def test_timeout_is_cached_and_not_restarted():
+    release = threading.Event()
+    calls = []
+
+    def stuck(ctx):
+        calls.append(1)
+        release.wait(5)
+        return OK, "late"
+
+    runner = PreflightRunner({"stuck": {"func": stuck, "ttl": 60.0, "timeout": 0.1},
+                              "fast": {"func": lambda ctx: (OK, "ok"), "ttl": 60.0, "timeout": 1.0}},
+                             timeout_ttl=0.2)
+    first = {r["check"]: r for r in runner.run({})}
+    assert first["stuck"]["status"] == TIMEOUT and first["fast"]["status"] == OK
+    second = {r["check"]: r for r in runner.run({})}
+    assert second["stuck"]["status"] == TIMEOUT and second["stuck"]["cached"]
+    time.sleep(0.25)
+    assert runner.run({}, names=["stuck"])[0]["status"] == TIMEOUT
+    assert len(calls) == 1   # le thread bloqué est réutilisé, pas relancé
+    release.set()
+    time.sleep(0.1)
+    late = runner.run({}, names=["stuck"])[0]
+    assert late["status"] == OK and late["cached"]
+
+_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from preflight import PreflightRunner
+PreflightRunner({"slow": {"func": lambda ctx: time.sleep(5), "ttl": 1, "timeout": 0.2}}).run({})
+"""
+
+def test_stuck_check_does_not_delay_exit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    t0 = time.monotonic()
+    subprocess.run([sys.executable, "-c", _SCRIPT, root], check=True, timeout=30)
+    assert time.monotonic() - t0 < 3
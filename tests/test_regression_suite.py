@@ -0,0 +1,146 @@
+# tests/test_regression_suite.py
+# -*- coding: utf-8 -*-
+import os, shutil
+
+import pytest
+
+from regression_suite import SuiteIndex, empty_diff, parse_suite, split_category_blocks
+
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "RegressionSuite.xml")
+
+DOC = """<?xml version="1.0" encoding="UTF-8"?>
+<regression_suite>
+    <metadata><version>1.0</version></metadata>
+    <!-- <category name="Ghost"><test id="G1"/></category> -->
+    <category name="CAN">
+        <test id="T1" priority="high"><name>one</name><timeout>10</timeout></test>
+        <test id="T2"><name>two</name></test>
+    </category>
+    <!-- separator -->
+    <category name="LIN">
+        <test id="T3"><name>three</name></test>
+    </category>
+</regression_suite>
+"""
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+@pytest.fixture
+def suite_file(tmp_path):
+    path = str(tmp_path / "suite.xml")
+    _write(path, DOC)
+    return path
+
+def test_load_matches_parse_suite(suite_file, tmp_path):
+    idx = SuiteIndex(suite_file)
+    assert idx.load() == parse_suite(suite_file)
+    assert list(idx.suite["categories"]) == ["CAN", "LIN"]
+    copy = str(tmp_path / "RegressionSuite.xml")
+    shutil.copy(SUITE, copy)
+    assert SuiteIndex(copy).load() == parse_suite(copy)
+
+def test_commented_category_is_ignored():
+    skeleton, blocks = split_category_blocks(DOC.encode())
+    assert len(blocks) == 2
+    assert b"Ghost" in skeleton
+
+def test_poll_diff(suite_file):
+    idx = SuiteIndex(suite_file)
+    idx.load()
+    assert idx.poll() is None
+    _write(suite_file, DOC.replace("<name>two</name>", "<name>deux</name>")
+                          .replace('<test id="T3">', '<test id="T4"><name>four</name></test>\n        <test id="T3">'))
+    diff = idx.poll()
+    assert diff["added"] == ["T4"] and diff["modified"] == ["T2"] and diff["removed"] == []
+    assert diff["categories"] == {"added": [], "removed": [], "modified": ["CAN", "LIN"]}
+    assert idx.suite == parse_suite(suite_file)
+
+def test_comment_only_change(suite_file):
+    idx = SuiteIndex(suite_file)
+    idx.load()
+    _write(suite_file, DOC.replace("separator", "another comment"))
+    diff = idx.poll()
+    assert diff["categories"] == {"added": [], "removed": [], "modified": []}
+    assert idx.suite == parse_suite(suite_file)
+
+def test_crlf_only_change_is_not_a_modification(suite_file):
+    idx = SuiteIndex(suite_file)
+    idx.load()
+    _write(suite_file, DOC.replace("\n", "\r\n"))
+    diff = idx.poll()
+    assert diff["categories"] == {"added": [], "removed": [], "modified": []}
+    assert not diff["metadata_changed"]
+
+def test_duplicate_ids_and_categories_are_rejected(suite_file):
+    idx = SuiteIndex(suite_file)
+    idx.load()
+    before = dict(idx.suite["tests"])
+    _write(suite_file, DOC.replace('<test id="T3">', '<test id="T1">'))
+    with pytest.raises(ValueError, match="Duplicate test id T1"):
+        idx.poll()
+    with pytest.raises(ValueError):
+        parse_suite(suite_file)
+    _write(suite_file, DOC.replace('name="LIN"', 'name="CAN"'))
+    with pytest.raises(ValueError, match="Duplicate category"):
+        idx.poll()
+    with pytest.raises(ValueError):
+        parse_suite(suite_file)
+    assert idx.suite["tests"] == before
+
+@pytest.mark.parametrize("edit", [
+    ("<!-- separator -->", "<broken>"),                       # texte entre les blocs
+    ("<metadata>", "<metadata><oops>"),                       # entête
+    ("</regression_suite>", "</regression_suite><extra/>"),   # fin de document
+    ("<regression_suite>", "<suite>"),                        # racine
+    ('<category name="LIN">', '<group><category name="LIN">'),
+])
+def test_invalid_edits_keep_previous_suite(suite_file, edit):
+    idx = SuiteIndex(suite_file)
+    idx.load()
+    before = {k: dict(v) if isinstance(v, dict) else v for k, v in idx.suite.items()}
+    text = DOC.replace(*edit)
+    if edit[0] == "<regression_suite>":
+        text = text.replace("</regression_suite>", "</suite>")
+    _write(suite_file, text)
+    with pytest.raises(ValueError):
+        idx.poll()
+    assert idx.suite == before
+    with pytest.raises(Exception):
+        parse_suite(suite_file)
+
+@pytest.mark.parametrize("edit", [
+    ('<category name="LIN">', '<category name="Empty"/>\n    <category name="LIN">'),    # auto-fermante
+    ('<category name="LIN">', '<category>'),                                            # sans name
+    ('<category name="LIN">', '<category name="LIN" note="a &gt; b" other=\'x>y\'>'),   # '>' dans un attribut
+    ('<name>one</name>', '<name>one</name><category>CAN</category>'),                   # <category> de test
+])
+def test_parity_with_parse_suite(suite_file, edit):
+    _write(suite_file, DOC.replace(*edit))
+    idx = SuiteIndex(suite_file)
+    assert idx.load() == parse_suite(suite_file)
+    idx2 = SuiteIndex(suite_file)
+    _write(suite_file, DOC)
+    idx2.load()
+    _write(suite_file, DOC.replace(*edit))
+    idx2.poll()
+    assert idx2.suite == parse_suite(suite_file)
+
+def test_unterminated_category(suite_file):
+    _write(suite_file, DOC.replace("</category>\n</regression_suite>", "\n</regression_suite>"))
+    with pytest.raises(ValueError):
+        SuiteIndex(suite_file).load()
+
+def test_revert_after_failed_edit_clears_error(suite_file):
+    idx = SuiteIndex(suite_file)
+    idx.load()
+    _write(suite_file, DOC.replace("<!-- separator -->", "<broken>"))
+    with pytest.raises(ValueError):
+        idx.poll()
+    _write(suite_file, DOC)
+    assert idx.poll() == empty_diff()
+    assert idx.poll() is None
+    assert idx.suite == parse_suite(suite_file)
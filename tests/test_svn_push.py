@@ -0,0 +1,141 @@
+# tests/test_svn_push.py
+# -*- coding: utf-8 -*-
+import json, os, shutil, subprocess
+
+import pytest
+
+import svn_push
+from svn_push import plan, stage, commit, push, resume, discard, pending_pushes
+
+def _manifest(files):
+    return {"push_id": "p1", "url": "file:///repo/results", "message": "m",
+            "files": {dest: {"sha1": sha1, "size": 1, "local": dest} for dest, sha1 in files.items()}}
+
+def test_plan():
+    manifest = _manifest({"reports/a.html": "s1", "reports/b.html": "s2", "configs/deep/c.cfx": "s3"})
+    remote = {"reports": {"kind": "dir", "revision": 3},
+              "reports/a.html": {"kind": "file", "revision": 3},
+              "reports/b.html": {"kind": "file", "revision": 5}}
+    state = {"file:///repo/results": {"reports/a.html": {"sha1": "s1", "revision": 3},
+                                      "reports/b.html": {"sha1": "s2", "revision": 4}}}
+    ops = plan(manifest, remote, state)
+    assert ops["skipped"] == ["reports/a.html"]          # même sha1 et même révision distante
+    assert ops["puts"] == ["configs/deep/c.cfx", "reports/b.html"]   # b modifié à distance depuis
+    assert ops["mkdirs"] == ["configs", "configs/deep"]
+    assert plan(manifest, {}, {})["puts"] == sorted(manifest["files"])
+
+def _artifacts(tmp_path, content="report"):
+    src = tmp_path / "report.html"
+    src.write_text(content)
+    return [(str(src), "reports/report.html")]
+
+def test_failed_resume_is_isolated_and_discardable(tmp_path, monkeypatch):
+    root = str(tmp_path / "stage")
+    bad = stage("file:///nowhere/bad", _artifacts(tmp_path), "m", root)
+    good = stage("file:///nowhere/good", _artifacts(tmp_path), "m", root)
+
+    def fake_commit(manifest, stage_root, check_previous=False, timeout=None):
+        if manifest["url"].endswith("bad"):
+            raise RuntimeError("svn: E170013: Unable to connect")
+        shutil.rmtree(os.path.join(stage_root, manifest["push_id"]))
+        return {"push_id": manifest["push_id"], "status": "committed", "revision": 7}
+
+    monkeypatch.setattr(svn_push, "commit", fake_commit)
+    assert svn_push.main(["--stage-root", root, "--resume", "all"]) == 1
+    assert pending_pushes(root) == [bad["push_id"]]
+    assert discard(bad["push_id"], root)
+    assert pending_pushes(root) == []
+    assert not discard(good["push_id"], root)
+
+def test_no_new_staging_while_same_url_is_pending(tmp_path, monkeypatch):
+    root = str(tmp_path / "stage")
+    pending = stage("file:///nowhere/a", _artifacts(tmp_path), "m", root)
+    with pytest.raises(svn_push.PendingPushError, match=pending["push_id"]):
+        push("file:///nowhere/a/", _artifacts(tmp_path), "again", root)
+    assert pending_pushes(root) == [pending["push_id"]]   # aucune copie supplémentaire
+
+    monkeypatch.setattr(svn_push, "commit", lambda manifest, stage_root, timeout=None: {"timeout": timeout})
+    assert push("file:///nowhere/b", _artifacts(tmp_path), "other url", root, timeout=7)["timeout"] == 7
+    assert pending_pushes(root, "file:///nowhere/a") == [pending["push_id"]]
+
+def test_svn_calls_have_a_timeout(tmp_path, monkeypatch):
+    root = str(tmp_path / "stage")
+    timeouts = []
+
+    def fake_list(url, timeout=None):
+        timeouts.append(("list", timeout))
+        return {}
+
+    def fake_run(cmd, cwd=None, timeout=None):
+        timeouts.append((cmd[1], timeout))
+        if cmd[1] == "info":
+            return '<info><entry revision="4"/></info>'
+        return "<log/>"
+
+    def fake_mucc(url, actions, message, timeout=None):
+        timeouts.append(("svnmucc", timeout))
+        raise subprocess.TimeoutExpired("svnmucc", timeout)
+
+    monkeypatch.setattr(svn_push, "svn_list_tree", fake_list)
+    monkeypatch.setattr(svn_push, "run", fake_run)
+    monkeypatch.setattr(svn_push, "svnmucc_commit", fake_mucc)
+    manifest = stage("file:///nowhere/a", _artifacts(tmp_path), "m", root)
+    with pytest.raises(subprocess.TimeoutExpired):
+        commit(manifest, root, timeout=5)
+    with pytest.raises(subprocess.TimeoutExpired):
+        resume(manifest["push_id"], root, timeout=5)
+    assert timeouts == [("list", 5), ("info", 5), ("svnmucc", 5),
+                        ("log", 5), ("list", 5), ("info", 5), ("svnmucc", 5)]
+
+# ---------- Intégration: dépôt file:// ----------
+needs_svn = pytest.mark.skipif(not all(shutil.which(t) for t in ("svn", "svnmucc", "svnadmin")),
+                               reason="svn, svnmucc and svnadmin are required")
+
+@pytest.fixture
+def repo_url(tmp_path):
+    repo = tmp_path / "repo"
+    subprocess.run(["svnadmin", "create", str(repo)], check=True)
+    url = repo.as_uri() + "/results"
+    subprocess.run(["svn", "mkdir", "-m", "init", url], check=True, capture_output=True)
+    return url
+
+def _svn_cat(url):
+    return subprocess.run(["svn", "cat", url], check=True, capture_output=True, text=True).stdout
+
+@needs_svn
+def test_push_dedup_and_resume(tmp_path, repo_url, monkeypatch):
+    root = str(tmp_path / "stage")
+    artifacts = _artifacts(tmp_path, "v1")
+    r1 = push(repo_url, artifacts, "first", root)
+    assert r1["status"] == "committed" and r1["uploaded"] == 1
+    assert _svn_cat(repo_url + "/reports/report.html") == "v1"
+
+    r2 = push(repo_url, artifacts, "same", root)          # inchangé: rien à envoyer
+    assert r2["status"] == "up_to_date" and r2["skipped"] == 1
+
+    # commit passé côté serveur mais réponse perdue: resume() le retrouve via svn log
+    artifacts = _artifacts(tmp_path, "v2")
+    real = svn_push.svnmucc_commit
+
+    def lost_reply(*args, **kwargs):
+        real(*args, **kwargs)
+        raise subprocess.TimeoutExpired("svnmucc", 1)
+
+    monkeypatch.setattr(svn_push, "svnmucc_commit", lost_reply)
+    manifest = stage(repo_url, artifacts, "second", root)
+    with pytest.raises(subprocess.TimeoutExpired):
+        commit(manifest, root)
+    monkeypatch.setattr(svn_push, "svnmucc_commit", real)
+    with open(os.path.join(root, manifest["push_id"], "manifest.json"), encoding="utf-8") as f:
+        assert json.load(f)["base_rev"] == r1["revision"]
+    r3 = resume(manifest["push_id"], root)
+    assert r3["revision"] == r1["revision"] + 1 and r3["round_trips"] == 1
+    assert pending_pushes(root) == []
+    assert _svn_cat(repo_url + "/reports/report.html") == "v2"
+
+    # échec avant l'envoi: resume() renvoie réellement les fichiers
+    artifacts = _artifacts(tmp_path, "v3")
+    manifest = stage(repo_url, artifacts, "third", root)
+    r4 = resume(manifest["push_id"], root)
+    assert r4["status"] == "committed" and r4["revision"] == r3["revision"] + 1
+    assert _svn_cat(repo_url + "/reports/report.html") == "v3"
@@ -0,0 +1,120 @@
+# tests/test_trace_analysis.py
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from trace_analysis import (decode_asc_block, evaluate_check, evaluate_suite, forwarded_mask,
+                            load_frames, select, write_synthetic_asc, FRAME_DTYPE)
+
+def test_decode_asc_block():
+    block = (b"date Mon Oct 19 10:00:00.000 am 2026\n"
+             b"   1.250000 1  1A3             Rx   d 8 01 02 03 04 05 06 07 08  Length = 0\n"
+             b"   1.251000 2  18FEF100x       Tx   d 3 DE ad 0F\n"
+             b"   1.252000 1  ErrorFrame\n"
+             b"   1.253000 1  7FF             Rx   d 0\n")
+    frames = decode_asc_block(block)
+    assert len(frames) == 3
+    assert frames["id"].tolist() == [0x1A3, 0x18FEF100, 0x7FF]
+    assert frames["extended"].tolist() == [False, True, False]
+    assert frames["channel"].tolist() == [1, 2, 1]
+    assert frames["dir"].tolist() == [0, 1, 0]
+    assert frames["dlc"].tolist() == [8, 3, 0]
+    assert frames["data"][0].tolist() == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert frames["data"][1].tolist() == [0xDE, 0xAD, 0x0F, 0, 0, 0, 0, 0]
+    assert frames["time"].tolist() == [1.25, 1.251, 1.253]
+    assert decode_asc_block(b"no frames here\n").dtype == FRAME_DTYPE
+
+def _frames(rows):
+    out = np.zeros(len(rows), dtype=FRAME_DTYPE)
+    for i, (t, can_id, b0) in enumerate(rows):
+        out[i]["time"], out[i]["id"], out[i]["data"][0] = t, can_id, b0
+    return out
+
+def test_forwarded_mask():
+    source = _frames([(1.0, 0x100, 1), (2.0, 0x100, 2), (3.0, 0x200, 1), (4.0, 0x300, 1)])
+    target = _frames([(1.0005, 0x100, 1),     # même id + payload, dans la fenêtre
+                      (2.5, 0x100, 2),        # trop tard
+                      (3.001, 0x200, 9),      # payload différent
+                      (3.9, 0x300, 1)])       # avant la source
+    assert forwarded_mask(source, target, 0.001).tolist() == [True, False, False, False]
+    assert forwarded_mask(source, target, 0.6).tolist() == [True, True, False, False]
+    assert forwarded_mask(source, target[:0], 1.0).tolist() == [False] * 4
+
+def test_synthetic_trace_cache_and_forwarding(tmp_path):
+    path = write_synthetic_asc(str(tmp_path / "gw.asc"), n_frames=3000, invalid_ratio=0.1, seed=1)
+    frames = load_frames(path, chunk_size=4096)
+    assert isinstance(frames, np.memmap) or frames.base is not None
+    assert os.path.isfile(path + ".frames.npy")
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+    assert np.array_equal(load_frames(path, use_cache=False), frames)
+
+    rx = frames[select(frames, {"channel": 1, "dir": "Rx"})]
+    tx = frames[select(frames, {"channel": 2, "dir": "Tx"})]
+    assert len(rx) == 3000
+    valid = rx[rx["id"] < 0x700]
+    assert forwarded_mask(valid, tx, 0.002).all()
+    invalid = rx[rx["id"] >= 0x700]
+    assert len(invalid) and not forwarded_mask(invalid, tx, 0.002).any()
+
+def test_base_dec_is_rejected(tmp_path):
+    path = tmp_path / "dec.asc"
+    path.write_bytes(b"date Mon Oct 19 10:00:00.000 am 2026\nbase dec  timestamps absolute\n"
+                     b"Begin Triggerblock\n   1.000000 1  419             Rx   d 1 255\n")
+    with pytest.raises(ValueError, match="base dec"):
+        load_frames(str(path))
+    assert not os.path.exists(str(path) + ".frames.npy")
+
+# ---------- Verdicts ----------
+REJECT_INVALID = {"type": "not_forwarded", "within_ms": 5,
+                  "source": {"channel": 1, "dir": "Rx", "id_range": ["0x700", "0x7FF"]},
+                  "target": {"channel": 2, "dir": "Tx"}}
+
+@pytest.fixture(scope="module")
+def gateway(tmp_path_factory):
+    d = tmp_path_factory.mktemp("gw")
+    clean = load_frames(write_synthetic_asc(str(d / "clean.asc"), 4000, invalid_ratio=0.1, seed=2))
+    leaky = load_frames(write_synthetic_asc(str(d / "leaky.asc"), 4000, invalid_ratio=0.1, leak_ratio=0.2, seed=2))
+    return clean, leaky
+
+def test_not_forwarded_verdicts(gateway):
+    clean, leaky = gateway
+    ok = evaluate_check(clean, REJECT_INVALID)
+    assert ok["verdict"] == "PASS" and ok["source_frames"] > 0 and ok["forwarded"] == 0
+    bad = evaluate_check(leaky, REJECT_INVALID)
+    assert bad["verdict"] == "FAIL" and 0 < bad["forwarded"] < bad["source_frames"]
+    assert bad["first_offending_time"] >= leaky["time"][0]
+    wrong_channel = dict(REJECT_INVALID, source=dict(REJECT_INVALID["source"], channel=3))
+    assert evaluate_check(clean, wrong_channel)["verdict"] == "INCONCLUSIVE"
+
+def test_forwarded_verdicts(gateway):
+    clean, _ = gateway
+    valid = {"type": "forwarded", "within_ms": 5,
+             "source": {"channel": 1, "dir": "Rx", "id_range": ["0x000", "0x6FF"]}, "target": {"channel": 2}}
+    assert evaluate_check(clean, valid)["verdict"] == "PASS"
+    assert evaluate_check(clean, dict(valid, within_ms=0.5))["verdict"] == "FAIL"
+
+def test_present_and_absent_verdicts(gateway):
+    clean, leaky = gateway
+    rx = {"channel": 1, "dir": "Rx"}
+    assert evaluate_check(clean, {"type": "present", "filter": rx, "min_count": 4000}) == \
+        {"verdict": "PASS", "matched": 4000}
+    assert evaluate_check(clean, {"type": "present", "filter": rx, "min_count": 4001})["verdict"] == "FAIL"
+    invalid_tx = {"channel": 2, "id_range": ["0x700", "0x7FF"]}
+    assert evaluate_check(clean, {"type": "absent", "filter": invalid_tx})["verdict"] == "PASS"
+    leaked = evaluate_check(leaky, {"type": "absent", "filter": invalid_tx})
+    assert leaked["verdict"] == "FAIL" and leaked["matched"] > 0
+    with pytest.raises(ValueError):
+        evaluate_check(clean, {"type": "sometimes"})
+
+def test_evaluate_suite(gateway):
+    _, leaky = gateway
+    suite = {"tests": {"TST_SEC_002": {"expected_result": "Invalid packets REJECTED"},
+                       "TST_CAN_001": {"expected_result": "Frames received"}}}
+    verdicts = evaluate_suite(leaky, {"TST_SEC_002": REJECT_INVALID}, suite)
+    assert verdicts["TST_SEC_002"]["verdict"] == "FAIL"
+    assert verdicts["TST_SEC_002"]["expected_result"] == "Invalid packets REJECTED"
+    assert verdicts["TST_CAN_001"] == {"verdict": "NOT_EVALUATED"}
+    with pytest.raises(ValueError, match="TST_SEC_02"):
+        evaluate_suite(leaky, {"TST_SEC_02": REJECT_INVALID}, suite)
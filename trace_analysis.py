@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# trace_analysis.py
+# -*- coding: utf-8 -*-
+"""
+Analyse des traces de mesure CANoe (format ASC) et calcul des verdicts par test.
+
+Le fichier ASC est lu par memory-map et par blocs; chaque bloc est décodé en
+tableau NumPy structuré (FRAME_DTYPE). Le résultat est mis en cache dans
+'<trace>.frames.npy' et relu en mmap_mode='r', donc les analyses suivantes ne
+re-parsent pas le texte. Les checks sont des filtres vectorisés (ID, canal,
+direction, fenêtre temporelle, payload/masque).
+
+Checks (JSON, par id de test):
+    {
+      "TST_SEC_002": {"type": "not_forwarded", "within_ms": 50,
+                      "source": {"channel": 1, "dir": "Rx", "id_range": ["0x700", "0x7FF"]},
+                      "target": {"channel": 2, "dir": "Tx"}},
+      "TST_CAN_001": {"type": "present", "min_count": 100, "filter": {"channel": 1}}
+    }
+Types: present, absent, forwarded, not_forwarded.
+Les traces BLF (binaires compressées) doivent être converties en ASC au préalable,
+et exportées en 'base hex' (les traces 'base dec' sont refusées).
+"""
+import argparse, json, mmap, os, re, sys, tempfile
+
+import numpy as np
+
+FRAME_DTYPE = np.dtype([
+    ("time", "f8"),
+    ("channel", "u1"),
+    ("dir", "u1"),        # 0 = Rx, 1 = Tx
+    ("extended", "?"),
+    ("dlc", "u1"),
+    ("id", "u4"),
+    ("data", "u1", (8,)),
+])
+DIRS = {"Rx": 0, "Tx": 1}
+
+# Ligne CAN classique ASC:  "   1.234567 1  1A3x   Rx   d 8 01 02 03 04 05 06 07 08  Length = ..."
+# (octets de données séparés par un seul espace, comme écrit par CANoe)
+_ASC_FRAME = re.compile(
+    rb"^[ \t]*(\d+\.\d+)[ \t]+(\d+)[ \t]+([0-9A-Fa-f]{1,8})(x?)[ \t]+(Rx|Tx)[ \t]+[dD][ \t]+(\d+)"
+    rb"(?:[ \t]+([0-9A-Fa-f]{2}(?:[ \t][0-9A-Fa-f]{2}){0,7}))?",
+    re.MULTILINE,
+)
+_ASC_BASE = re.compile(rb"^[ \t]*base[ \t]+(hex|dec)\b", re.MULTILINE | re.IGNORECASE)
+# Table ASCII -> valeur hexadécimale (tout autre caractère -> 0)
+_HEX_LUT = np.full(256, 0, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX_LUT[_c] = _i
+for _i, _c in enumerate(b"ABCDEF"):
+    _HEX_LUT[_c] = 10 + _i
+
+# ---------- Decoding ----------
+def _hex_columns(values: list[bytes], width: int) -> np.ndarray:
+    """Convertit des chaînes hex (justifiées à droite sur width) en matrice de nibbles (n, width)."""
+    raw = b"".join(v.rjust(width, b"0") for v in values)
+    return _HEX_LUT[np.frombuffer(raw, dtype=np.uint8).reshape(-1, width)]
+
+def decode_asc_block(block: bytes) -> np.ndarray:
+    """Décode toutes les trames CAN d'un bloc de texte ASC."""
+    matches = _ASC_FRAME.findall(block)
+    if not matches:
+        return np.empty(0, dtype=FRAME_DTYPE)
+    times, chans, ids, ext, dirs, dlcs, payloads = zip(*matches)
+    n = len(matches)
+    frames = np.empty(n, dtype=FRAME_DTYPE)
+    frames["time"] = np.array(times, dtype="S").astype(np.float64)
+    frames["channel"] = np.array(chans, dtype="S").astype(np.uint8)
+    frames["dlc"] = np.minimum(np.array(dlcs, dtype="S").astype(np.uint8), 8)
+    frames["dir"] = np.array(dirs, dtype="S") == b"Tx"
+    frames["extended"] = np.array(ext, dtype="S") == b"x"
+
+    nibbles = _hex_columns(ids, 8).astype(np.uint32)
+    frames["id"] = nibbles @ (np.uint32(16) ** np.arange(7, -1, -1, dtype=np.uint32))
+
+    # payload "01 02 .. 08" -> colonnes fixes de 24 octets (octets absents = padding NUL -> 0)
+    digits = _HEX_LUT[np.array(payloads, dtype="S24").view(np.uint8).reshape(n, 24)]
+    frames["data"] = (digits[:, 0::3] << 4) | digits[:, 1::3]
+    return frames
+
+def check_asc_header(head: bytes, path: str = "trace"):
+    """Refuse les traces 'base dec' (IDs et octets en décimal): le décodeur lit de l'hexadécimal."""
+    m = _ASC_BASE.search(head)
+    if m and m.group(1).lower() == b"dec":
+        raise ValueError(f"{path}: 'base dec' ASC traces are not supported, log with 'base hex'")
+
+def iter_asc_chunks(path: str, chunk_size: int = 64 << 20):
+    """Memory-map le fichier ASC et produit des tableaux de trames par bloc (coupés sur fin de ligne)."""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start, size = 0, len(mm)
+        begin = mm.find(b"Begin Triggerblock", 0, 1 << 16)
+        check_asc_header(mm[:begin if begin >= 0 else min(size, 4096)], path)
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                nl = mm.find(b"\n", end)
+                end = size if nl < 0 else nl + 1
+            frames = decode_asc_block(mm[start:end])
+            if len(frames):
+                yield frames
+            start = end
+
+def _write_frames_npy(chunks, cache: str):
+    """
+    Écrit les blocs dans un .npy sans tout garder en mémoire: les trames sont
+    d'abord ajoutées à un fichier brut, puis recopiées par tranches dans un
+    open_memmap de la taille finale. Noms temporaires uniques (jobs parallèles).
+    """
+    directory, base = os.path.split(os.path.abspath(cache))
+    fd, raw_tmp = tempfile.mkstemp(prefix=base + ".", suffix=".raw.tmp", dir=directory)
+    fd2, npy_tmp = tempfile.mkstemp(prefix=base + ".", suffix=".tmp", dir=directory)
+    os.close(fd2)
+    try:
+        n = 0
+        with os.fdopen(fd, "wb") as raw:
+            for frames in chunks:
+                frames.tofile(raw)
+                n += len(frames)
+        out = np.lib.format.open_memmap(npy_tmp, mode="w+", dtype=FRAME_DTYPE, shape=(n,))
+        if n:
+            src = np.memmap(raw_tmp, dtype=FRAME_DTYPE, mode="r", shape=(n,))
+            step = max(1, (64 << 20) // FRAME_DTYPE.itemsize)
+            for i in range(0, n, step):
+                out[i:i + step] = src[i:i + step]
+            del src
+        out.flush()
+        del out
+        os.replace(npy_tmp, cache)
+    finally:
+        for tmp in (raw_tmp, npy_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def load_frames(path: str, use_cache: bool = True, chunk_size: int = 64 << 20) -> np.ndarray:
+    """
+    Retourne toutes les trames de la trace. Avec use_cache, le décodage est écrit
+    bloc par bloc dans '<path>.frames.npy' et relu en memory-map tant que la trace
+    n'a pas changé. Sans cache, les trames sont assemblées en mémoire.
+    """
+    cache = path + ".frames.npy"
+    if use_cache and os.path.isfile(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return np.load(cache, mmap_mode="r")
+    if use_cache:
+        _write_frames_npy(iter_asc_chunks(path, chunk_size), cache)
+        return np.load(cache, mmap_mode="r")
+    chunks = list(iter_asc_chunks(path, chunk_size))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=FRAME_DTYPE)
+
+# ---------- Filters ----------
+def _as_int(v) -> int:
+    return int(v, 0) if isinstance(v, str) else int(v)
+
+def select(frames: np.ndarray, flt: dict | None) -> np.ndarray:
+    """
+    Masque booléen des trames correspondant au filtre:
+    ids, id_range [lo, hi], channel, dir ("Rx"/"Tx"), extended, t_start, t_end,
+    payload ("DE AD .."), payload_mask ("FF FF ..").
+    """
+    mask = np.ones(len(frames), dtype=bool)
+    if not flt:
+        return mask
+    if "ids" in flt:
+        mask &= np.isin(frames["id"], np.array([_as_int(x) for x in flt["ids"]], dtype=np.uint32))
+    if "id_range" in flt:
+        lo, hi = (_as_int(x) for x in flt["id_range"])
+        mask &= (frames["id"] >= lo) & (frames["id"] <= hi)
+    if "channel" in flt:
+        mask &= frames["channel"] == int(flt["channel"])
+    if "dir" in flt:
+        mask &= frames["dir"] == DIRS[flt["dir"]]
+    if "extended" in flt:
+        mask &= frames["extended"] == bool(flt["extended"])
+    if "t_start" in flt:
+        mask &= frames["time"] >= float(flt["t_start"])
+    if "t_end" in flt:
+        mask &= frames["time"] <= float(flt["t_end"])
+    if "payload" in flt:
+        value = np.frombuffer(bytes.fromhex(flt["payload"]).ljust(8, b"\0"), dtype=np.uint8)
+        pmask = bytes.fromhex(flt["payload_mask"]) if "payload_mask" in flt \
+            else b"\xff" * len(bytes.fromhex(flt["payload"]))
+        pmask = np.frombuffer(pmask.ljust(8, b"\0"), dtype=np.uint8)
+        mask &= np.all((frames["data"] & pmask) == (value & pmask), axis=1)
+    return mask
+
+def forwarded_mask(source: np.ndarray, target: np.ndarray, within_s: float) -> np.ndarray:
+    """
+    Pour chaque trame source: existe-t-il une trame cible de même ID et même payload
+    dans [t, t + within_s] ? Recherche vectorisée (clé composite triée + searchsorted).
+    """
+    if len(source) == 0:
+        return np.zeros(0, dtype=bool)
+    if len(target) == 0:
+        return np.zeros(len(source), dtype=bool)
+    # code entier par couple (id, payload): tri lexicographique puis numérotation des groupes
+    ids = np.concatenate([source["id"], target["id"]])
+    data = np.concatenate([np.ascontiguousarray(source["data"]).view(np.uint64).ravel(),
+                           np.ascontiguousarray(target["data"]).view(np.uint64).ravel()])
+    order = np.lexsort((data, ids))
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (np.diff(ids[order]) != 0) | (np.diff(data[order]) != 0)
+    codes = np.empty(len(order), dtype=np.int64)
+    codes[order] = np.cumsum(new_group) - 1
+    src_code, tgt_code = codes[:len(source)], codes[len(source):]
+
+    t0 = min(source["time"].min(), target["time"].min())
+    src_us = np.round((source["time"] - t0) * 1e6).astype(np.int64)
+    tgt_us = np.round((target["time"] - t0) * 1e6).astype(np.int64)
+    within_us = int(round(within_s * 1e6))
+    span = int(max(src_us.max(), tgt_us.max())) + within_us + 1
+    if (int(codes.max()) + 1) * span >= np.iinfo(np.int64).max:
+        raise ValueError("Trace too long for composite key; split the time window.")
+
+    tgt_key = np.sort(tgt_code * span + tgt_us)
+    src_key = src_code * span + src_us
+    pos = np.searchsorted(tgt_key, src_key, side="left")
+    found = pos < len(tgt_key)
+    found[found] = tgt_key[pos[found]] <= src_key[found] + within_us
+    return found
+
+# ---------- Checks & verdicts ----------
+def evaluate_check(frames: np.ndarray, spec: dict) -> dict:
+    kind = spec.get("type")
+    if kind in ("present", "absent"):
+        count = int(np.count_nonzero(select(frames, spec.get("filter"))))
+        if kind == "present":
+            ok = count >= int(spec.get("min_count", 1))
+        else:
+            ok = count <= int(spec.get("max_count", 0))
+        return {"verdict": "PASS" if ok else "FAIL", "matched": count}
+    if kind in ("forwarded", "not_forwarded"):
+        source = frames[select(frames, spec.get("source"))]
+        target = frames[select(frames, spec.get("target"))]
+        fwd = forwarded_mask(source, target, float(spec.get("within_ms", 100)) / 1000.0)
+        n_fwd = int(np.count_nonzero(fwd))
+        if len(source) == 0:
+            verdict = "INCONCLUSIVE"
+        elif kind == "forwarded":
+            verdict = "PASS" if n_fwd == len(source) else "FAIL"
+        else:
+            verdict = "PASS" if n_fwd == 0 else "FAIL"
+        result = {"verdict": verdict, "source_frames": len(source), "forwarded": n_fwd}
+        if verdict == "FAIL":
+            bad = source[fwd] if kind == "not_forwarded" else source[~fwd]
+            result["first_offending_time"] = float(bad["time"][0])
+        return result
+    raise ValueError(f"Unknown check type: {kind!r}")
+
+def load_checks(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def evaluate_suite(frames: np.ndarray, checks: dict, suite: dict | None = None) -> dict[str, dict]:
+    """
+    Verdict par test; les tests de la suite sans check sont NOT_EVALUATED.
+    Un check dont l'id n'est pas dans la suite (faute de frappe) est refusé.
+    """
+    if suite:
+        unknown = sorted(set(checks) - set(suite["tests"]))
+        if unknown:
+            raise ValueError(f"Checks for unknown test id(s): {', '.join(unknown)}")
+    test_ids = list(suite["tests"]) if suite else list(checks)
+    verdicts = {}
+    for tid in test_ids:
+        spec = checks.get(tid)
+        if spec is None:
+            verdicts[tid] = {"verdict": "NOT_EVALUATED"}
+            continue
+        verdicts[tid] = evaluate_check(frames, spec)
+        if suite:
+            verdicts[tid]["expected_result"] = suite["tests"][tid]["expected_result"]
+    return verdicts
+
+def analyze_trace(trace_path: str, checks_path: str, suite: dict | None = None) -> dict[str, dict]:
+    return evaluate_suite(load_frames(trace_path), load_checks(checks_path), suite)
+
+# ---------- Synthetic traces ----------
+def write_synthetic_asc(path: str, n_frames: int = 100_000, invalid_ratio: float = 0.05,
+                        leak_ratio: float = 0.0, seed: int = 0) -> str:
+    """
+    Génère une trace ASC de passerelle: trames Rx sur le canal 1, les IDs valides
+    (< 0x700) sont recopiés en Tx sur le canal 2 après ~1 ms; les IDs invalides
+    (0x700-0x7FF) sont rejetés, sauf une fraction leak_ratio.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.uniform(0.0002, 0.002, n_frames))
+    invalid = rng.random(n_frames) < invalid_ratio
+    ids = np.where(invalid, rng.integers(0x700, 0x800, n_frames), rng.integers(0x100, 0x700, n_frames))
+    data = rng.integers(0, 256, (n_frames, 8))
+    fwd = ~invalid | (rng.random(n_frames) < leak_ratio)
+    with open(path, "w", encoding="ascii") as f:
+        f.write("date Mon Oct 19 10:00:00.000 am 2026\nbase hex  timestamps absolute\n"
+                "internal events logged\nBegin Triggerblock\n")
+        for start in range(0, n_frames, 50_000):
+            lines = []
+            for i in range(start, min(start + 50_000, n_frames)):
+                payload = " ".join(f"{b:02X}" for b in data[i])
+                lines.append(f"{t[i]:11.6f} 1  {ids[i]:X}             Rx   d 8 {payload}\n")
+                if fwd[i]:
+                    lines.append(f"{t[i] + 0.001:11.6f} 2  {ids[i]:X}             Tx   d 8 {payload}\n")
+            f.write("".join(lines))
+        f.write("End TriggerBlock\n")
+    return path
+
+# ---------- CLI ----------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Evaluate test verdicts from a CANoe ASC trace.")
+    ap.add_argument("trace", help="ASC trace file.")
+    ap.add_argument("--checks", help="JSON checks file (per test id).")
+    ap.add_argument("--suite", help="Regression suite XML (reports NOT_EVALUATED tests too).")
+    ap.add_argument("--synthetic", type=int, metavar="N", help="Write a synthetic trace of N frames first.")
+    ap.add_argument("--no-cache", action="store_true", help="Do not write/read the .frames.npy cache.")
+    args = ap.parse_args(argv)
+
+    if args.synthetic:
+        write_synthetic_asc(args.trace, args.synthetic)
+    frames = load_frames(args.trace, use_cache=not args.no_cache)
+    print(json.dumps({"frames": len(frames)}))
+    if not args.checks:
+        return 0
+    suite = None
+    if args.suite:
+        from regression_suite import parse_suite
+        suite = parse_suite(args.suite)
+    verdicts = evaluate_suite(frames, load_checks(args.checks), suite)
+    print(json.dumps(verdicts, indent=2))
+    return 0 if all(v["verdict"] in ("PASS", "NOT_EVALUATED") for v in verdicts.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())